@@ -7,43 +7,79 @@ import os
 import sys
 import argparse
 import json
+import logging
 import time
 import re
+import shutil
+import traceback
+import array
+import binascii
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
 import random
 import signal
-import hashlib
-import http.client
 import urllib.parse
-from io import BytesIO
-from gzip import GzipFile
-import requests
-from threading import BoundedSemaphore, Thread, Event
-from datetime import timedelta
-import shutil
+import threading
+from threading import Thread, Event
+from concurrent.futures import ThreadPoolExecutor
+import sqlite3
+import atexit
+import functools
+
+# Playwright, requests and BeautifulSoup are slow to import, so they are
+# imported where they are first used rather than at startup
+if TYPE_CHECKING:
+    from playwright.sync_api import Page
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
 
 try:
-    from playwright.sync_api import sync_playwright, Page, Browser
+    from tqdm import tqdm
+    from tqdm.utils import CallbackIOWrapper
 except ImportError:
-    print("Playwright not found. Installing required packages...")
-    os.system("pip install playwright")
-    os.system("playwright install")
-    from playwright.sync_api import sync_playwright, Page, Browser
+    tqdm = None
+
+try:
+    from rapidfuzz import fuzz, process as fuzz_process
+    from rapidfuzz.utils import default_process
+except ImportError:
+    fuzz = None
 
 # Constants
 CONFIG_DIR = Path.home() / ".anime_downloader"
-DATABASE_FILE = CONFIG_DIR / "database.json"
+DATABASE_FILE = CONFIG_DIR / "database.sqlite"
+LEGACY_DATABASE_FILE = CONFIG_DIR / "database.json"
 CONFIG_FILE = CONFIG_DIR / "config.json"
 DOWNLOAD_DIR = Path.home() / "Downloads" / "Anime"
 
+# Diagnostic output goes through this logger; set ANIME_LOG=DEBUG (or INFO) to see it.
+# ANIME_DEBUG=1 is kept as a shortcut for ANIME_LOG=DEBUG.
+logging.basicConfig(format="%(levelname)s: %(message)s")
+log = logging.getLogger("anime")
+_log_level = (os.environ.get("ANIME_LOG") or ("DEBUG" if os.environ.get("ANIME_DEBUG") else "WARNING")).strip().upper()
+# Level names (DEBUG, INFO, ...) or numbers (10, 20, ...); anything else falls back to WARNING
+_level = int(_log_level) if _log_level.isdecimal() else logging.getLevelName(_log_level)
+if isinstance(_level, int):
+    log.setLevel(_level)
+else:
+    log.setLevel(logging.WARNING)
+    log.warning(f"Unknown ANIME_LOG level {_log_level!r}, using WARNING")
+
 # Ensure directories exist
 CONFIG_DIR.mkdir(exist_ok=True)
 DOWNLOAD_DIR.mkdir(exist_ok=True, parents=True)
 
 # Print database information for debugging
-print(f"Database path: {DATABASE_FILE}")
-print(f"Database exists: {DATABASE_FILE.exists()}")
+log.debug(f"Database path: {DATABASE_FILE}")
+log.debug(f"Database exists: {DATABASE_FILE.exists()}")
 
 # ANSI Colors for terminal output
 class bcolors:
@@ -65,114 +101,359 @@ HEADERS = {
     "Accept-Encoding": "gzip",
 }
 
+# Bytes deleted by AnimeDatabase.normalize_title (everything except [a-z0-9])
+_TITLE_KEEP = frozenset(b"abcdefghijklmnopqrstuvwxyz0123456789")
+_TITLE_DELETE = bytes(c for c in range(256) if c not in _TITLE_KEEP)
+
+# JSON encoding of stored metadata; orjson is several times faster when installed
+if orjson is not None:
+    def _json_dumps(obj: Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+    _json_loads = orjson.loads
+else:
+    _json_dumps = json.dumps
+    _json_loads = json.loads
+
+@functools.lru_cache(maxsize=4096)
+def normalize_title(title: str) -> str:
+    """Normalize a title for better matching (lowercase, remove spaces and special chars)."""
+    # Convert to lowercase, drop non-ASCII, then delete everything but [a-z0-9]
+    return title.lower().encode('ascii', 'ignore').translate(None, _TITLE_DELETE).decode('ascii')
+
+# File host labels guessed from a download URL, first match wins
+_HOST_LABELS = (
+    ("drive.google", "Google Drive"),
+    ("mediafire", "MediaFire"),
+    ("mega", "MEGA"),
+    ("solidfiles", "SolidFiles"),
+    ("mp4upload", "MP4Upload"),
+    ("4shared", "4shared"),
+    ("yandex", "Yandex"),
+)
+
+# Same-line status updates: clear the rest of the line instead of padding with
+# spaces, and only redraw every few items in tight loops
+_CLEAR_EOL = "\x1b[K"
+_PROGRESS_EVERY = 16
+
+# ANSI codes for CLI._colorize, and the terminal width used to centre the logo
+_COLOR_CODES = {
+    'black': '\033[30m',
+    'red': '\033[31m',
+    'green': '\033[32m',
+    'yellow': '\033[33m',
+    'blue': '\033[34m',
+    'magenta': '\033[35m',
+    'cyan': '\033[36m',
+    'white': '\033[37m',
+    'bold': '\033[1m',
+    'underline': '\033[4m',
+}
+_RESET = '\033[0m'
+_TERMINAL_WIDTH = shutil.get_terminal_size((80, 24)).columns
+
+@functools.lru_cache(maxsize=4096)
+def _ansi(text: str, color: str) -> str:
+    """text in the given color; cached since the same labels and numbers are redrawn over and over."""
+    return _COLOR_CODES.get(color, '') + str(text) + _RESET
+
+def _episode_key(number: str):
+    """Dedup key for an episode number: an int when numeric (so "07" and "7" collide), else the string."""
+    return int(number) if number.isdecimal() else number
+
+def _episode_sort_key(episode: Dict[str, Any]) -> int:
+    """Sort key for episode dicts: numeric episodes in order, anything else last."""
+    try:
+        # One C call on the common all-digits path
+        return int(episode["number"])
+    except ValueError:
+        return sys.maxsize
+
+# Precompiled patterns used in scraping loops
+_ANIME_PATH_RE = re.compile(r'(https?://[^/]+/anime/[^/]+)/?')
+_DOMAIN_RE = re.compile(r'https?://([^/]+)')
+_BASE_URL_RE = re.compile(r'(https?://[^/]+)')
+_OPEN_EP_RE = re.compile(r"""openEpisode\(\s*['"]([^'"]+)['"]\s*\)""")
+# Episode number in an episode URL: the /episode/<slug>-<n>/ form or "الحلقة-<n>", in one scan
+_EP_NUMBER_RE = re.compile(r'/episode/[^/]+-(\d+)/?$|الحلقة[-\s]*(\d+)')
+_EP_AR_RE = re.compile(r'الحلقة[-\s]*(\d+)')
+_DIGITS_RE = re.compile(r'(\d+)')
+
+# Precompiled patterns for the file-host downloaders
+_GDRIVE_ID_RES = tuple(re.compile(p) for p in (
+    r'https?://drive\.google\.com/file/d/([^/]+)',
+    r'https?://drive\.google\.com/open\?id=([^&]+)',
+    r'https?://drive\.google\.com/uc\?id=([^&]+)',
+))
+# Drive's "can't scan for viruses" page: a form whose hidden inputs carry the confirm token
+_GDRIVE_FORM_ACTION_RE = re.compile(rb'<form[^>]+id="download-form"[^>]+action="([^"]+)"')
+_GDRIVE_FORM_INPUT_RE = re.compile(rb'<input type="hidden" name="([^"]+)" value="([^"]*)"')
+_MF_FILE_RE = re.compile(r"mediafire\.com/(folder|file|file_premium)/([a-zA-Z0-9]+)")
+_MF_ALT_RE = re.compile(r"mediafire\.com/\?([a-zA-Z0-9]+)")
+# Matched against raw page bytes while the page is still streaming in
+_MF_DIRECT_RE = re.compile(rb'href="(https://download[^"]+)"')
+# Literal key before Solidfiles' direct link in the page's embedded JSON
+_SOLIDFILES_URL_KEY = 'downloadUrl":"'
+# 4shared link markup, one alternation per kind of link so a page is scanned once per
+# kind; attributes are matched within their tag ([^>]*) instead of across the page
+_4SHARED_DOWNLOAD_RE = re.compile(
+    r'id="baseDownloadButton"[^>]*href="([^"]+)"'
+    r'|id="directDownloadLink"[^>]*href="([^"]+)"'
+    r'|<a[^>]*class="dbtn[^>]*href="([^"]+)"'
+    r'|href="(https?://[^"]+?/get/[^"]+?)"'
+    r'|<a[^>]*class="linkShowD"[^>]*href="([^"]+)"'
+)
+_4SHARED_FREE_RE = re.compile(
+    r'href="([^"]+download/free/[^"]+)"'
+    r'|<a[^>]*class="freeDownloadButton"[^>]*href="([^"]+)"'
+    r'|id="freeDownloadButton"[^>]*href="([^"]+)"'
+)
+_4SHARED_JS_RE = re.compile(r'var dlLink = "([^"]+)";|var url = "([^"]+)";')
+_4SHARED_COUNTDOWN_RE = re.compile(r'var c = (\d+);')
+_FILENAME_RE = re.compile(r'filename="([^"]+)"')
+# Download source of an episode link; the group that matched (lastgroup) names the source
+_SOURCE_RE = re.compile(
+    r'(?P<mediafire>mediafire\.com)'
+    r'|(?P<gdrive>drive\.google\.com|docs\.google\.com)'
+    r'|(?P<fourshared>4shared\.com)'
+    r'|(?P<mega>mega\.nz)',
+    re.I
+)
+# One comma-separated part of an episode selection: "3-7" or "5"
+_SELECTION_PART_RE = re.compile(r'\s*(?:(\d+)\s*-\s*(\d+)|(\d+))\s*$')
+# Case-insensitive host/URL tests for download_anime_episode and _prioritize_servers,
+# matched on the original strings instead of lowercased copies
+_MF_HOST_RE = re.compile(r'mediafire', re.I)
+_MF_URL_RE = re.compile(r'mediafire\.com', re.I)
+_MF_PREFIX_RE = re.compile(r'https://(?:www\.)?mediafire\.com/', re.I)
+_GDRIVE_HOST_RE = re.compile(r'google|drive', re.I)
+_GDRIVE_URL_RE = re.compile(r'drive\.(?:usercontent\.)?google\.com', re.I)
+# Server priority by host label (lower is better); the best matching group wins
+_SERVER_PRIORITY_RE = re.compile(
+    r'(?P<p0>mediafire)|(?P<p1>google|drive)|(?P<p2>mega)'
+    r'|(?P<p3>solidfiles)|(?P<p4>mp4upload)|(?P<p5>dropbox)',
+    re.I
+)
+
+def _first_group(pattern: "re.Pattern[str]", text: str) -> Optional[str]:
+    """The group that matched in the first match of an alternation of one-group patterns, or None."""
+    match = pattern.search(text)
+    return next(group for group in match.groups() if group is not None) if match else None
+
+def _quoted_after(text: str, key: str, start: int = 0) -> Optional[str]:
+    """The non-empty text between key and the next double quote, located with str.find, or None."""
+    i = text.find(key, start)
+    if i < 0:
+        return None
+    i += len(key)
+    j = text.find('"', i)
+    return text[i:j] if j > i else None
+
 # Check if we're running on repl.it
 def is_replit():
     return 'REPL_ID' in os.environ
 
+def _load_sync_playwright():
+    """Import Playwright on first use, installing it if it is missing."""
+    try:
+        from playwright.sync_api import sync_playwright
+    except ImportError:
+        print("Playwright not found. Installing required packages...")
+        os.system("pip install playwright")
+        os.system("playwright install")
+        from playwright.sync_api import sync_playwright
+    return sync_playwright
+
 # Ensure Playwright browsers are installed
-def ensure_playwright_browsers():
+def ensure_playwright_browsers(playwright):
     try:
-        # First check if we're on repl.it
+        # Only repl.it installs browsers on demand
         if is_replit():
-            print("Running on repl.it environment, checking for Playwright browsers...")
-            
-            # Try to detect if browsers are missing
-            try:
-                with sync_playwright() as p:
-                    browser = p.chromium.launch()
-                    browser.close()
-                print("Playwright browsers are already installed!")
-            except Exception as e:
-                if "Executable doesn't exist" in str(e):
-                    print("Playwright browsers are missing. Installing now...")
-                    os.system("python -m playwright install chromium")
-                    print("Installation complete. If you still encounter issues, please run:")
-                    print("python -m playwright install")
-                    print("in the terminal/shell.")
-                else:
-                    print(f"Unexpected error with Playwright: {e}")
+            # Look for the Chromium executable instead of launching a browser to find out
+            if Path(playwright.chromium.executable_path).exists():
+                return
+            print("Playwright browsers are missing. Installing now...")
+            os.system("python -m playwright install chromium")
+            print("Installation complete. If you still encounter issues, please run:")
+            print("python -m playwright install")
+            print("in the terminal/shell.")
     except Exception as e:
         print(f"Error while ensuring Playwright browsers: {e}")
         print("If you encounter browser errors, please run:")
         print("python -m playwright install")
         print("in the terminal/shell.")
 
-# Run the browser check early
-ensure_playwright_browsers()
-
 
 class AnimeDatabase:
     """Handles storage and retrieval of anime metadata and navigation patterns."""
     
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS anime (title TEXT PRIMARY KEY, metadata TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS titles (norm TEXT PRIMARY KEY, title TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS aliases (norm TEXT PRIMARY KEY, title TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS nav (site TEXT PRIMARY KEY, pattern TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS history (id INTEGER PRIMARY KEY AUTOINCREMENT, entry TEXT NOT NULL);
+        CREATE TABLE IF NOT EXISTS pages (url TEXT PRIMARY KEY, etag TEXT, last_modified TEXT,
+                                          link TEXT NOT NULL, fetched REAL NOT NULL);
+    """
+    
+    # Seconds between background commits of pending writes
+    FLUSH_INTERVAL = 2.0
+    
+    # Only the most recent history entries are kept
+    HISTORY_LIMIT = 500
+    
+    # Seconds a file host page's cached direct link is kept
+    PAGE_CACHE_TTL = 24 * 3600
+    
     def __init__(self):
-        self.data = self._load_database()
+        self._lock = threading.RLock()
+        self._dirty = False
+        self.conn = self._load_database()
+        
+        # Writes are batched into one transaction and committed periodically
+        # by a daemon thread, and once more when the process exits
+        self._stop_flushing = Event()
+        Thread(target=self._flush_loop, daemon=True).start()
+        atexit.register(self.flush)
     
-    def _load_database(self) -> Dict[str, Any]:
-        """Load the database from file or create a new one if it doesn't exist."""
+    def _load_database(self) -> sqlite3.Connection:
+        """Open the database, creating it (and migrating the old JSON file) if it doesn't exist."""
         try:
-            if DATABASE_FILE.exists():
-                print(f"Loading database from {DATABASE_FILE}")
-                with open(DATABASE_FILE, 'r', encoding='utf-8') as f:
-                    return json.load(f)
-            else:
-                print(f"Creating new database at {DATABASE_FILE}")
+            is_new = not DATABASE_FILE.exists()
+            if is_new:
+                log.info(f"Creating new database at {DATABASE_FILE}")
                 # Ensure parent directory exists
                 DATABASE_FILE.parent.mkdir(exist_ok=True, parents=True)
-                return {
-                    "anime": {},
-                    "normalized_titles": {},  # Maps normalized titles to actual titles
-                    "aliases": {},            # Maps aliases to actual titles
-                    "navigation_patterns": {},
-                    "history": [],
-                    "preferences": {}
-                }
+            else:
+                log.info(f"Loading database from {DATABASE_FILE}")
+            
+            # Transactions are managed explicitly (see _write/flush)
+            conn = sqlite3.connect(DATABASE_FILE, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(self.SCHEMA)
+            
+            if is_new and LEGACY_DATABASE_FILE.exists():
+                self._migrate_json_database(conn)
+            return conn
         except Exception as e:
-            print(f"Error loading database: {e}")
-            import traceback
-            traceback.print_exc()
-            # Return empty database as fallback
-            return {
-                "anime": {},
-                "normalized_titles": {},
-                "aliases": {},
-                "navigation_patterns": {},
-                "history": [],
-                "preferences": {}
-            }
+            log.exception(f"Error loading database: {e}")
+            # Fall back to an in-memory database so the session still works
+            conn = sqlite3.connect(":memory:", isolation_level=None, check_same_thread=False)
+            conn.executescript(self.SCHEMA)
+            return conn
     
-    def save(self):
-        """Save the current database to file."""
+    def _migrate_json_database(self, conn: sqlite3.Connection):
+        """One-shot import of the old database.json into the SQLite tables."""
+        log.info(f"Migrating {LEGACY_DATABASE_FILE} to {DATABASE_FILE}")
         try:
-            # Ensure directory exists
-            DATABASE_FILE.parent.mkdir(exist_ok=True, parents=True)
-            
-            with open(DATABASE_FILE, 'w', encoding='utf-8') as f:
-                json.dump(self.data, f, indent=2)
-            print(f"Database saved to {DATABASE_FILE}")
+            data = None
+            if ijson is None:
+                with open(LEGACY_DATABASE_FILE, 'rb') as f:
+                    data = _json_loads(f.read())
+            
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT OR REPLACE INTO anime (title, metadata) VALUES (?, ?)",
+                ((title, _json_dumps(metadata)) for title, metadata in self._iter_legacy(data, "anime"))
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO titles (norm, title) VALUES (?, ?)",
+                self._iter_legacy(data, "normalized_titles")
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO aliases (norm, title) VALUES (?, ?)",
+                self._iter_legacy(data, "aliases")
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO nav (site, pattern) VALUES (?, ?)",
+                ((site, _json_dumps(pattern)) for site, pattern in self._iter_legacy(data, "navigation_patterns"))
+            )
+            conn.executemany(
+                "INSERT INTO history (entry) VALUES (?)",
+                ((_json_dumps(entry),) for entry in self._iter_legacy(data, "history"))
+            )
+            conn.execute("COMMIT")
+            count = conn.execute("SELECT COUNT(*) FROM anime").fetchone()[0]
+            log.info(f"Migrated {count} anime from the JSON database")
         except Exception as e:
-            print(f"Error saving database: {e}")
-            import traceback
-            traceback.print_exc()
+            if conn.in_transaction:
+                conn.execute("ROLLBACK")
+            log.error(f"Error migrating JSON database: {e}")
+    
+    @staticmethod
+    def _iter_legacy(data: Optional[Dict[str, Any]], section: str):
+        """Yield the entries of one top-level section of database.json.
+        
+        Objects yield (key, value) pairs and the history list yields entries. With ijson
+        installed the file is streamed per section instead of being loaded whole."""
+        if data is not None:
+            value = data.get(section, [] if section == "history" else {})
+            yield from (value if section == "history" else value.items())
+            return
+        with open(LEGACY_DATABASE_FILE, 'rb') as f:
+            if section == "history":
+                yield from ijson.items(f, "history.item", use_float=True)
+            else:
+                yield from ijson.kvitems(f, section, use_float=True)
+    
+    def _write(self, sql: str, params=()) -> sqlite3.Cursor:
+        """Run a mutation inside the pending transaction and mark the database dirty."""
+        with self._lock:
+            if not self.conn.in_transaction:
+                self.conn.execute("BEGIN")
+            cursor = self.conn.execute(sql, params)
+            self._dirty = True
+            return cursor
+    
+    def _read(self, sql: str, params=()) -> list:
+        """Run a query and return all rows (sees writes that are not committed yet)."""
+        with self._lock:
+            return self.conn.execute(sql, params).fetchall()
+    
+    def _flush_loop(self):
+        """Commit pending writes every FLUSH_INTERVAL seconds."""
+        while not self._stop_flushing.wait(self.FLUSH_INTERVAL):
+            if self._dirty:
+                self.flush()
+    
+    def flush(self):
+        """Commit any pending writes to disk."""
+        try:
+            with self._lock:
+                if self.conn.in_transaction:
+                    self.conn.execute("COMMIT")
+                self._dirty = False
+        except Exception as e:
+            log.exception(f"Error saving database: {e}")
+    
+    def save(self):
+        """Commit pending writes immediately instead of waiting for the next background flush."""
+        self.flush()
+        log.debug(f"Database saved to {DATABASE_FILE}")
     
     def normalize_title(self, title: str) -> str:
-        """Normalize a title for better matching (lowercase, remove spaces and special chars)."""
-        import re
-        # Convert to lowercase, remove spaces and special characters
-        normalized = re.sub(r'[^a-z0-9]', '', title.lower())
-        print(f"Normalized title: '{title}' -> '{normalized}'")
-        return normalized
+        """Normalize a title for better matching (cached, see module-level normalize_title)."""
+        return normalize_title(title)
     
     def add_anime(self, title: str, metadata: Dict[str, Any]):
         """Add or update anime metadata in the database."""
-        print(f"Adding/updating anime in database: '{title}'")
+        log.debug(f"Adding/updating anime in database: '{title}'")
         
         # Store the anime with its original title
-        self.data["anime"][title] = metadata
+        self._write(
+            "INSERT OR REPLACE INTO anime (title, metadata) VALUES (?, ?)",
+            (title, _json_dumps(metadata))
+        )
         
         # Add normalized title mapping
         normalized_title = self.normalize_title(title)
-        self.data["normalized_titles"][normalized_title] = title
-        print(f"Added normalized title mapping: '{normalized_title}' -> '{title}'")
+        self._write(
+            "INSERT OR REPLACE INTO titles (norm, title) VALUES (?, ?)",
+            (normalized_title, title)
+        )
+        log.debug(f"Added normalized title mapping: '{normalized_title}' -> '{title}'")
         
         # Auto-generate some common aliases
         # For titles with spaces, add a version without spaces
@@ -186,8 +467,6 @@ class AnimeDatabase:
         # For titles that are not all uppercase, add uppercase version
         if title.upper() != title:
             self.add_alias(title.upper(), title)
-            
-        self.save()
     
     def add_alias(self, alias: str, title: str):
         """Add an alias for an anime title."""
@@ -196,79 +475,381 @@ class AnimeDatabase:
             
         normalized_alias = self.normalize_title(alias)
         # Only add if the normalized alias doesn't exist yet
-        if normalized_alias not in self.data["normalized_titles"]:
-            self.data["aliases"][normalized_alias] = title
-            print(f"Added alias: '{alias}' -> '{title}'")
-            self.save()
+        cursor = self._write(
+            "INSERT OR REPLACE INTO aliases (norm, title) "
+            "SELECT ?, ? WHERE NOT EXISTS (SELECT 1 FROM titles WHERE norm = ?)",
+            (normalized_alias, title, normalized_alias)
+        )
+        if cursor.rowcount:
+            log.debug(f"Added alias: '{alias}' -> '{title}'")
+    
+    # Title lookup in priority order, each branch a primary-key probe
+    FIND_TITLE_SQL = """
+        SELECT title, 'anime', 0 FROM anime WHERE title = ?1
+        UNION ALL SELECT title, 'titles', 1 FROM titles WHERE norm = ?2
+        UNION ALL SELECT title, 'aliases', 2 FROM aliases WHERE norm = ?2
+        ORDER BY 3 LIMIT 1
+    """
     
     def find_anime_by_title(self, search_title: str) -> Optional[str]:
         """Find anime by title, using normalization and aliases for better matching."""
-        print(f"Searching for anime with title: '{search_title}'")
+        log.debug(f"Searching for anime with title: '{search_title}'")
         
-        # First try direct match
-        if search_title in self.data["anime"]:
-            print(f"Found direct match for '{search_title}'")
-            return search_title
-            
-        # Try normalized title
+        # Direct match first, then the normalized title, then aliases: all three
+        # primary-key probes in one query, the best-ranked hit winning
         normalized_search = self.normalize_title(search_title)
-        print(f"Checking normalized title: '{normalized_search}'")
-        print(f"Available normalized titles: {list(self.data['normalized_titles'].keys())}")
-        
-        # Check in normalized titles
-        if normalized_search in self.data["normalized_titles"]:
-            found_title = self.data["normalized_titles"][normalized_search]
-            print(f"Found match in normalized titles: '{normalized_search}' -> '{found_title}'")
-            return found_title
-            
-        # Check in aliases
-        print(f"Checking aliases for: '{normalized_search}'")
-        print(f"Available aliases: {list(self.data['aliases'].keys())}")
-        if normalized_search in self.data["aliases"]:
-            found_title = self.data["aliases"][normalized_search]
-            print(f"Found match in aliases: '{normalized_search}' -> '{found_title}'")
+        rows = self._read(self.FIND_TITLE_SQL, (search_title, normalized_search))
+        if rows:
+            found_title, source, _ = rows[0]
+            log.debug(f"Found match in {source}: '{search_title}' -> '{found_title}'")
             return found_title
             
         # No match found
-        print(f"No match found for '{search_title}'")
+        log.debug(f"No match found for '{search_title}'")
         return None
     
     def get_anime(self, title: str) -> Optional[Dict[str, Any]]:
         """Get anime metadata by title."""
         # Try to find the anime with the title as-is
-        anime_data = self.data["anime"].get(title)
-        if anime_data:
-            return anime_data
+        rows = self._read("SELECT metadata FROM anime WHERE title = ?", (title,))
+        if rows:
+            return _json_loads(rows[0][0])
             
         # Try to find with normalization and aliases
         actual_title = self.find_anime_by_title(title)
         if actual_title:
-            return self.data["anime"].get(actual_title)
+            rows = self._read("SELECT metadata FROM anime WHERE title = ?", (actual_title,))
+            if rows:
+                return _json_loads(rows[0][0])
             
         return None
     
+    def get_all_anime(self) -> Dict[str, Dict[str, Any]]:
+        """Get metadata for every saved anime, keyed by title in sorted order (SQLite's
+        BINARY collation on UTF-8 orders titles the same way sorted() does)."""
+        return {title: _json_loads(metadata) for title, metadata in self._read("SELECT title, metadata FROM anime ORDER BY title")}
+    
     def add_navigation_pattern(self, site: str, pattern: Dict[str, Any]):
         """Add or update a navigation pattern for a site."""
-        self.data["navigation_patterns"][site] = pattern
-        self.save()
+        self._write(
+            "INSERT OR REPLACE INTO nav (site, pattern) VALUES (?, ?)",
+            (site, _json_dumps(pattern))
+        )
     
     def get_navigation_pattern(self, site: str) -> Optional[Dict[str, Any]]:
         """Get a navigation pattern for a site."""
-        return self.data["navigation_patterns"].get(site)
+        rows = self._read("SELECT pattern FROM nav WHERE site = ?", (site,))
+        return _json_loads(rows[0][0]) if rows else None
+    
+    def get_page_link(self, url: str) -> Optional[tuple]:
+        """Return (etag, last_modified, direct link) cached for a file host page, or None."""
+        rows = self._read(
+            "SELECT etag, last_modified, link FROM pages WHERE url = ? AND fetched > ?",
+            (url, time.time() - self.PAGE_CACHE_TTL)
+        )
+        return rows[0] if rows else None
+    
+    def set_page_link(self, url: str, etag: Optional[str], last_modified: Optional[str], link: str):
+        """Cache the direct link found on a file host page with the page's validators."""
+        now = time.time()
+        self._write("DELETE FROM pages WHERE fetched <= ?", (now - self.PAGE_CACHE_TTL,))
+        self._write(
+            "INSERT OR REPLACE INTO pages (url, etag, last_modified, link, fetched) VALUES (?, ?, ?, ?, ?)",
+            (url, etag, last_modified, link, now)
+        )
     
     def add_to_history(self, entry: Dict[str, Any]):
-        """Add an entry to the user's history."""
-        self.data["history"].append(entry)
-        self.save()
+        """Add an entry to the user's history, dropping the oldest beyond HISTORY_LIMIT."""
+        cursor = self._write("INSERT INTO history (entry) VALUES (?)", (_json_dumps(entry),))
+        self._write("DELETE FROM history WHERE id <= ?", (cursor.lastrowid - self.HISTORY_LIMIT,))
+    
+    def get_history(self, limit: int = HISTORY_LIMIT) -> List[Dict[str, Any]]:
+        """Return the most recent history entries, oldest first."""
+        rows = self._read("SELECT entry FROM history ORDER BY id DESC LIMIT ?", (limit,))
+        return [_json_loads(entry) for (entry,) in reversed(rows)]
 
 
 class SiteInteractor:
     """Handles interactions with anime websites using Playwright."""
     
+    # Requests that are aborted in every scraping context
+    BLOCKED_RESOURCE_TYPES = {"image", "media", "font", "stylesheet"}
+    BLOCKED_URL_PARTS = ("google-analytics.com", "googletagmanager.com", "doubleclick.net")
+    
+    # Last-resort episode finder: every element whose text looks like "الحلقة <n>"
+    NUMBERED_EPISODES_JS = """
+        () => {
+            const results = [];
+            const episodeRe = /الحلقة\\s+\\d+/;
+            const elements = document.querySelectorAll('*');
+            for (const el of elements) {
+                const text = el.innerText || el.textContent;
+                if (text && episodeRe.test(text)) {
+                    results.push({
+                        element: el,
+                        text: text,
+                        number: text.match(/\\d+/)[0]
+                    });
+                }
+            }
+            return results;
+        }
+    """
+    
+    # onclick handler of every episode element, plus its card text when there is no
+    # openEpisode handler to decode, read in one round-trip
+    EPISODE_ROWS_JS = """
+        (els) => els.map(el => {
+            const onclick = el.getAttribute('onclick');
+            if (onclick && onclick.includes('openEpisode')) return {onclick, cardText: null};
+            return {onclick, cardText: el.closest('.episode-card, .card')?.innerText || null};
+        })
+    """
+    
+    # First selector (in priority order) that matches anything under root (or the
+    # whole document), probed in one round-trip
+    PROBE_SELECTORS_JS = """
+        ({root, sels}) => sels.find(s => {
+            try { return (root || document).querySelector(s) !== null; } catch (e) { return false; }
+        }) || null
+    """
+    
+    # Submit the form enclosing the first element matching a selector; false if there is none
+    SUBMIT_FORM_JS = """
+        (sel) => {
+            const form = document.querySelector(sel)?.closest('form');
+            if (!form) return false;
+            form.submit();
+            return true;
+        }
+    """
+    
+    # Title and href of every item matched by the first item selector that finds
+    # anything, using the first title selector that matches inside each item
+    GENERIC_ITEMS_JS = """
+        ({itemSels, titleSels}) => {
+            for (const sel of itemSels) {
+                const items = document.querySelectorAll(sel);
+                if (!items.length) continue;
+                const out = [];
+                for (const item of items) {
+                    let titleEl = null;
+                    for (const t of titleSels) {
+                        titleEl = item.querySelector(t);
+                        if (titleEl) break;
+                    }
+                    const a = item.querySelector('a');
+                    if (titleEl && a) out.push({title: titleEl.innerText, link: a.getAttribute('href')});
+                }
+                return out;
+            }
+            return [];
+        }
+    """
+    
+    # Resolve the a.download-link with the given data-index: its real href, or
+    # "clicked" after clicking it (the index is passed as an argument, never spliced in)
+    CLICK_DOWNLOAD_LINK_JS = """
+        (dataIndex) => {
+            const link = Array.from(document.querySelectorAll('a.download-link[data-index]'))
+                .find(el => el.getAttribute('data-index') === dataIndex);
+            if (!link) return null;
+            
+            // Get the full URL from the link (might be set by JavaScript)
+            if (link.href && link.href !== "#" && !link.href.startsWith("javascript")) {
+                return link.href;
+            }
+            
+            // Try to dispatch a click event
+            link.click();
+            return "clicked";
+        }
+    """
+    
+    # Title and link of every search result card, extracted in one round-trip
+    SEARCH_CARDS_JS = """
+        (cards, titleSelector) => cards.map(card => {
+            let title = null;
+            const titleEl = card.querySelector(titleSelector);
+            if (titleEl) title = titleEl.innerText.trim();
+            if (!title) {
+                // Try to get the alt attribute from any img element
+                const img = card.querySelector('img');
+                if (img) title = img.getAttribute('alt');
+            }
+            if (!title) title = card.getAttribute('aria-label') || card.innerText.trim();
+            
+            // Try to get link from the card itself or any anchor inside
+            let link = card.getAttribute('href');
+            if (!link) {
+                const a = card.querySelector('a');
+                if (a) link = a.getAttribute('href');
+            }
+            return {title, link};
+        })
+    """
+    
+    # Server name, href and data-index of every download link, read in one round-trip
+    DOWNLOAD_LINKS_JS = """
+        (links) => links.map(a => ({
+            server: a.querySelector('span.notice')?.innerText?.trim() || 'Unknown Server',
+            href: a.getAttribute('href'),
+            dataIndex: a.getAttribute('data-index')
+        }))
+    """
+    
+    # Click every data-index link (those without a real href) with window.open
+    # stubbed out, and return the URLs each one tried to open, in order (or null). Handlers that
+    # navigate the page instead (location.href/assign/replace, form submits) are caught
+    # through the Navigation API and cancelled, so the page stays put; location's
+    # methods themselves are unforgeable and can't be stubbed. Without that API, a
+    # link whose inline onclick doesn't call open() is left for a real click.
+    CAPTURE_POPUP_URLS_JS = """
+        (links) => {
+            const originalOpen = window.open;
+            const nav = window.navigation;
+            let captured = [];
+            const onNavigate = (e) => {
+                if (!e.cancelable) return;
+                captured.push(e.destination.url);
+                e.preventDefault();
+            };
+            if (nav) nav.addEventListener('navigate', onNavigate);
+            window.open = (url) => {
+                if (url) captured.push(new URL(url, location.href).href);
+                return null;
+            };
+            try {
+                return links.map(a => {
+                    const href = a.getAttribute('href');
+                    if ((href && href !== '#') || !a.hasAttribute('data-index')) return null;
+                    const inline = a.getAttribute('onclick');
+                    if (!nav && inline && !/open/i.test(inline)) return null;
+                    captured = [];
+                    try { a.click(); } catch (e) {}
+                    return captured.length ? captured : null;
+                });
+            } finally {
+                window.open = originalOpen;
+                if (nav) nav.removeEventListener('navigate', onNavigate);
+            }
+        }
+    """
+    
+    # href and label of every download server link, read in one round-trip
+    SERVER_LINKS_JS = """
+        (links) => links.map(a => ({
+            href: a.getAttribute('href'),
+            text: a.innerText.trim() ||
+                  a.querySelector('.dashboard-button-text, .server-name, .notice')?.innerText?.trim() || ''
+        }))
+    """
+    
+    # Search result card containers, in priority order
+    SEARCH_CARD_SELECTORS = (
+        ".anime-card",
+        ".post-item",
+        ".anime-list-content .anime-card",
+        ".page-content-container .anime-card",
+        "article",
+        "[class*='anime']",
+        ".card",
+        ".movie-item",
+    )
+    
+    # The card title is the first element (in document order) matching any of these
+    SEARCH_TITLE_SELECTOR = "h3, .title, h2, .name, .anime-title, h3 a, .post-title, [class*='title']"
+    
+    # Episode link elements on witanime anime pages, in priority order
+    EPISODE_SELECTORS = (
+        "a[onclick*='openEpisode']",
+        ".episodes-card-container a.overlay",
+        ".episodes-list-content a.overlay",
+        ".episode-card a",
+        "a.overlay",
+        "[onclick*='openEpisode']",
+        ".card a",
+    )
+    
+    # Containers holding the download links on witanime episode pages
+    DOWNLOAD_CONTAINER_SELECTORS = (
+        ".episode-download-container",
+        ".content.episode-download-container",
+        ".download-container",
+        "[class*='download-container']",
+        ".mwidget",
+        ".quality-list",
+    )
+    
+    # Download links inside a download container
+    DOWNLOAD_LINK_SELECTORS = (
+        "a.download-link",
+        "a.btn.download-link",
+        "a.btn.btn-default.download-link",
+        "a[data-index]",
+        "a[class*='download']",
+        "a.btn",
+    )
+    
+    # Buttons leading from an episode page to its download page; the text matches
+    # are tried as one group before the purely structural fallbacks
+    DOWNLOAD_BUTTON_TEXT_SELECTORS = (
+        "a:has-text('تحميل الحلقة')",
+        "a:has-text('تحميل')",
+        ".btn-site:has-text('تحميل')",
+    )
+    DOWNLOAD_BUTTON_SELECTORS = (
+        ".btn-site",
+        "a.btn-site",
+        ".episodes-buttons-list a",
+        ".episode-buttons-container a",
+    )
+    
+    # Download server links on the download page
+    DOWNLOAD_SERVER_SELECTORS = (
+        ".download-servers a.dashboard-button",
+        ".download-servers a",
+        ".server-list a",
+        ".server-item a",
+        "a.dashboard-button",
+        "a[href*='drive.google']",
+        "a[href*='mediafire']",
+        ".quality-list a",
+        "a.download-link",
+        "a[class*='download']",
+    )
+    
+    # Markers that a search page was server-rendered with its result cards in place
+    STATIC_RESULT_MARKERS = ("anime-card", "post-item")
+    
+    # Card containers trusted on a page parsed without a browser (besides the site's own
+    # search_results selector); the broad SEARCH_CARD_SELECTORS fallbacks also match nav
+    # and sidebar markup, which only the browser path can afford to sift through
+    STATIC_CARD_SELECTORS = (".anime-card", ".post-item")
+    
+    # Browsers driven in parallel by the batch helpers
+    BATCH_WORKERS = 4
+    
+    # Navigations after which the context is replaced (keeping its cookies), so a
+    # long scrape doesn't keep growing the browser's memory
+    CONTEXT_RECYCLE_PAGES = 20
+    
+    # Seconds a clicked download link gets to open a tab or navigate the page (dead
+    # buttons do neither, so this is kept short), and then a tab that did open gets
+    # to leave about:blank
+    POPUP_START_TIMEOUT = 1.5
+    POPUP_TIMEOUT = 5.0
+    
     def __init__(self, database: AnimeDatabase):
         self.database = database
         self.playwright = None
         self.browser = None
+        self.context = None
+        # Mode the browser was (or will be) launched in; batch workers copy it
+        self.headless = True
+        self._pages_since_recycle = 0
+        # Screenshots and page titles are only captured when debug logging is on
+        self.debug = log.isEnabledFor(logging.DEBUG)
         self.current_page = None
         self.site_patterns = {
             "witanime.cyou": {
@@ -284,10 +865,19 @@ class SiteInteractor:
             }
         }
     
-    def start_browser(self, headless: bool = True):
-        """Start the browser."""
+    def start_browser(self, headless: bool = True, storage_state: Optional[Dict[str, Any]] = None):
+        """Start the browser, or keep using it if it is already running.
+        
+        storage_state seeds the context's cookies and local storage (see _open_context)."""
+        if self.browser and self.current_page:
+            return
+        self.headless = headless
+        
+        sync_playwright = _load_sync_playwright()
+        
         try:
             self.playwright = sync_playwright().start()
+            ensure_playwright_browsers(self.playwright)
             try:
                 # Special configuration for repl.it
                 browser_args = []
@@ -304,13 +894,7 @@ class SiteInteractor:
                     headless=headless,
                     args=browser_args
                 )
-                self.current_page = self.browser.new_page()
-                # Set timeout to 60 seconds for slow connections
-                self.current_page.set_default_timeout(60000)
-                # Add user agent to avoid detection
-                self.current_page.set_extra_http_headers({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"})
-                # Enable JavaScript to handle dynamic content
-                self.current_page.context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                self._open_context(storage_state)
             except Exception as e:
                 if "Executable doesn't exist" in str(e) and is_replit():
                     print("=" * 50)
@@ -326,10 +910,7 @@ class SiteInteractor:
                         "--disable-dev-shm-usage"
                     ]
                     self.browser = self.playwright.chromium.launch(headless=True, args=browser_args)
-                    self.current_page = self.browser.new_page()
-                    self.current_page.set_default_timeout(60000)
-                    self.current_page.set_extra_http_headers({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"})
-                    self.current_page.context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                    self._open_context()
                 elif "Host system is missing dependencies" in str(e) and is_replit():
                     print("=" * 50)
                     print("Missing system dependencies. Using special repl.it configuration...")
@@ -343,10 +924,7 @@ class SiteInteractor:
                     ]
                     # Force headless mode
                     self.browser = self.playwright.chromium.launch(headless=True, args=browser_args)
-                    self.current_page = self.browser.new_page()
-                    self.current_page.set_default_timeout(60000)
-                    self.current_page.set_extra_http_headers({"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36"})
-                    self.current_page.context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+                    self._open_context()
                 else:
                     raise e
         except Exception as e:
@@ -367,18 +945,108 @@ class SiteInteractor:
                 print("=" * 60 + "\n")
             raise e
     
+    def _open_context(self, storage_state: Optional[Dict[str, Any]] = None):
+        """Create the shared browser context, configured once for scraping, and its working page."""
+        # Add user agent to avoid detection
+        self.context = self.browser.new_context(
+            user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/96.0.4664.110 Safari/537.36",
+            storage_state=storage_state,
+        )
+        self._pages_since_recycle = 0
+        # Set timeout to 60 seconds for slow connections
+        self.context.set_default_timeout(60000)
+        # Enable JavaScript to handle dynamic content
+        self.context.add_init_script("Object.defineProperty(navigator, 'webdriver', {get: () => undefined})")
+        # Skip downloading images, fonts, styles and trackers; only the DOM is scraped
+        self.context.route("**/*", self._route_request)
+        self.current_page = self.context.new_page()
+    
+    def _recycle_context(self):
+        """Replace the browser context with a fresh one that carries over its cookies and storage."""
+        log.debug("Recycling the browser context")
+        try:
+            storage = self.context.storage_state()
+        except Exception:
+            storage = None
+        try:
+            self.context.close()
+        except Exception:
+            pass
+        self._open_context(storage)
+    
+    def _wait_for_popup(self, url_before: str, start_timeout: float = POPUP_START_TIMEOUT,
+                        timeout: float = POPUP_TIMEOUT) -> Optional["Page"]:
+        """After a click, wait until it opens a tab or navigates the page; return the new tab, if any.
+        
+        Nothing happening within start_timeout counts as a dead link; a tab that opened
+        gets timeout seconds to commit its first navigation."""
+        context = self.current_page.context
+        deadline = time.monotonic() + start_timeout
+        while time.monotonic() < deadline:
+            if len(context.pages) > 1:
+                new_page = context.pages[-1]
+                # A fresh tab starts on about:blank until its navigation commits
+                try:
+                    new_page.wait_for_url(lambda url: url != "about:blank", timeout=timeout * 1000)
+                except Exception:
+                    pass
+                return new_page
+            if self.current_page.url != url_before:
+                return None
+            # Lets Playwright dispatch the page/navigation events while polling
+            self.current_page.wait_for_timeout(100)
+        return None
+    
+    @staticmethod
+    def _pick_popup_url(urls: Optional[List[str]], server_name: str) -> Optional[str]:
+        """The download URL among those a data-index link's handlers opened, or None.
+        
+        One URL is taken as is; when several were opened (an ad or analytics handler may
+        call window.open too), the last one whose host mentions the server name wins."""
+        if not urls:
+            return None
+        if len(urls) == 1:
+            return urls[0]
+        words = re.findall(r'[a-z0-9]{3,}', server_name.lower())
+        for url in reversed(urls):
+            host = urllib.parse.urlsplit(url).hostname or ""
+            if any(word in host for word in words):
+                return url
+        return None
+    
+    @staticmethod
+    def _close_tab(page: "Page"):
+        """Close a popup tab without running its unload handlers."""
+        try:
+            page.close(run_before_unload=False)
+        except Exception:
+            pass
+    
+    def _route_request(self, route):
+        """Abort requests for resources the scraper never reads."""
+        request = route.request
+        if (request.resource_type in self.BLOCKED_RESOURCE_TYPES
+                or any(part in request.url for part in self.BLOCKED_URL_PARTS)):
+            route.abort()
+        else:
+            route.continue_()
+    
     def close_browser(self):
         """Close the browser."""
+        if not self.browser and not self.playwright:
+            return
+        
         try:
             if self.browser:
                 print("Closing browser...")
-                for page in self.browser.contexts[0].pages:
+                if self.context:
                     try:
-                        page.close()
+                        self.context.close()
                     except Exception:
                         pass
                 self.browser.close()
                 self.browser = None
+            self.context = None
             if self.playwright:
                 self.playwright.stop()
                 self.playwright = None
@@ -388,6 +1056,7 @@ class SiteInteractor:
             print(f"Warning: Error closing browser: {e}")
             # Reset browser objects even if close fails
             self.browser = None
+            self.context = None
             self.playwright = None
             self.current_page = None
     
@@ -400,7 +1069,12 @@ class SiteInteractor:
         if url.startswith('@'):
             url = url[1:]
         
-        self.current_page.goto(url)
+        if self._pages_since_recycle >= self.CONTEXT_RECYCLE_PAGES:
+            self._recycle_context()
+        self._pages_since_recycle += 1
+        
+        # Callers wait for the elements they need, so don't block on every subresource
+        self.current_page.goto(url, wait_until="domcontentloaded")
     
     def search_anime(self, site_url: str, query: str) -> List[Dict[str, Any]]:
         """Search for anime on a site and return the results."""
@@ -410,228 +1084,187 @@ class SiteInteractor:
                 site_url = site_url[1:]
             
             # Get the site's pattern or use a generic one
-            site_domain = self._extract_domain(site_url)
-            pattern = self.site_patterns.get(site_domain)
+            site_domain, pattern = self._site_pattern(site_url)
             
             if not pattern:
-                print(f"Warning: No predefined patterns for {site_domain}. Using generic patterns.")
+                log.warning(f"No predefined patterns for {site_domain}. Using generic patterns.")
                 return self._generic_search(site_url, query)
                 
             # Navigate to the search page with the query
             # Properly encode the search query (replace spaces with plus signs)
-            import urllib.parse
             encoded_query = urllib.parse.quote_plus(query)
             search_url = pattern["search_url"].format(encoded_query)
-            print(f"Navigating to search URL: {search_url}")
-            self.navigate_to(search_url)
-            
-            # Wait for page to load completely
-            print("Waiting for page to load completely...")
-            self.current_page.wait_for_load_state("networkidle", timeout=60000)
-            
-            # Additional wait to ensure JavaScript has executed
-            print("Giving extra time for JavaScript to execute...")
-            time.sleep(5)
-            
-            # Take a screenshot for debugging
-            self.current_page.screenshot(path="search_page.png")
-            print("Screenshot saved as search_page.png")
-            
-            # Print page title for debugging
-            print(f"Page title: {self.current_page.title()}")
-            
-            # Try different selector combinations for search results
-            selectors_to_try = [
-                ".anime-card",
-                ".post-item",
-                ".anime-list-content .anime-card",
-                ".page-content-container .anime-card",
-                "article",
-                "[class*='anime']",
-                ".card",
-                ".movie-item"
-            ]
             
-            elements = []
-            for selector in selectors_to_try:
-                print(f"Trying selector: {selector}")
-                try:
-                    found_elements = self.current_page.query_selector_all(selector)
-                    if found_elements and len(found_elements) > 0:
-                        print(f"Found {len(found_elements)} elements with selector {selector}")
-                        elements = found_elements
-                        break
-                except Exception as e:
-                    print(f"Error with selector {selector}: {e}")
+            # Cheap path first: many search pages are server-rendered and need no browser;
+            # fall back to the browser unless a card survives the query filter
+            cards = self._quick_search_cards(search_url, pattern)
+            results = self._search_results(cards, site_url, query) if cards else []
+            if not results:
+                results = self._search_results(self._browser_search_cards(search_url), site_url, query)
             
-            if not elements:
-                print("No anime results found with any selector")
-                return []
+            log.info(f"Total results matching '{query}': {len(results)}")
+            return results
+        except Exception as e:
+            log.exception(f"Error during search: {e}")
+            return []
+    
+    def _search_results(self, cards: List[Dict[str, Any]], site_url: str, query: str) -> List[Dict[str, str]]:
+        """The cards that have a title and link and match the query, one per title."""
+        # Extract the search results, keyed by title so duplicates update in place
+        results_by_title: Dict[str, Dict[str, str]] = {}
+        log.debug(f"Processing {len(cards)} anime results")
+        
+        base_url = self._get_base_url(site_url)
+        query_lower = query.lower()
+        
+        for card in cards:
+            try:
+                title = card["title"]
+                link = card["link"]
                 
-            # Extract the search results
-            results = []
-            print(f"Processing {len(elements)} anime results")
-            
-            # Use set to track unique URLs and avoid duplicates
-            seen_urls = set()
-            normalized_urls = {}
+                if link and not link.startswith("http"):
+                    link = f"{base_url}{link}"
+                
+                # Normalize the URL to anime/(animename) format if possible
+                normalized_link = link
+                anime_path_match = _ANIME_PATH_RE.match(link)
+                if anime_path_match:
+                    normalized_link = anime_path_match.group(1)
+                
+                # Make sure the result somewhat matches the query (case-insensitive)
+                if not (title and normalized_link) or query_lower not in title.lower():
+                    continue
+                
+                existing = results_by_title.get(title)
+                if existing is None:
+                    results_by_title[title] = {"title": title, "link": normalized_link}
+                    log.debug(f"Found anime: {title} - {normalized_link}")
+                elif "/anime/" in normalized_link and "/anime-type/" in existing["link"]:
+                    # If we've seen this title, keep the anime URL, not category URL
+                    existing["link"] = normalized_link
+            except Exception as e:
+                log.warning(f"Error extracting anime info: {e}")
+        
+        return list(results_by_title.values())
+    
+    def _quick_search_cards(self, search_url: str, pattern: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Fetch a search page over plain HTTP and parse its result cards, or return [] to fall back to the browser."""
+        try:
+            import requests
+            from bs4 import BeautifulSoup
+        except ImportError:
+            return []
+        
+        try:
+            response = requests.get(search_url, headers=HEADERS, timeout=10)
+            if response.status_code != 200:
+                return []
+            html = response.text
+            if not any(marker in html for marker in self.STATIC_RESULT_MARKERS):
+                # Results are rendered client-side (or the page is a challenge)
+                return []
             
-            for element in elements:
-                try:
-                    # Get title using various methods
-                    title = None
-                    
-                    # Try to find the title
-                    title_selectors = [
-                        "h3", ".title", "h2", ".name", ".anime-title", 
-                        "h3 a", ".post-title", "[class*='title']"
-                    ]
-                    
-                    for title_sel in title_selectors:
-                        title_elem = element.query_selector(title_sel)
-                        if title_elem:
-                            title = title_elem.inner_text().strip()
-                            break
-                    
-                    if not title:
-                        # Try to get the alt attribute from any img element
-                        img = element.query_selector("img")
-                        if img:
-                            title = img.get_attribute("alt")
-                    
-                    # If still no title, try to use aria-label or any text content
-                    if not title:
-                        title = element.get_attribute("aria-label") or element.inner_text().strip()
-                    
-                    # Find link
-                    link = None
-                    
-                    # Try to get link from the card itself or any anchor inside
-                    if element.get_attribute("href"):
-                        link = element.get_attribute("href")
-                    else:
-                        link_elem = element.query_selector("a")
-                        if link_elem:
-                            link = link_elem.get_attribute("href")
-                    
-                    if link and not link.startswith("http"):
-                        link = f"{self._get_base_url(site_url)}{link}"
-                    
-                    # Normalize the URL to anime/(animename) format if possible
-                    normalized_link = link
-                    anime_path_match = re.search(r'(https?://[^/]+/anime/[^/]+)/?', link)
-                    if anime_path_match:
-                        normalized_link = anime_path_match.group(1)
-                    
-                    # Skip URL if we've already seen it
-                    if normalized_link in seen_urls:
-                        continue
-                    
-                    if title and normalized_link:
-                        # Make sure the result somewhat matches the query (case-insensitive)
-                        if query.lower() in title.lower():
-                            # Check if we've seen this title before
-                            if title in normalized_urls:
-                                # If we've seen this title, keep the anime URL, not category URL
-                                if "/anime/" in normalized_link and "/anime-type/" in normalized_urls[title]:
-                                    seen_urls.remove(normalized_urls[title])
-                                    seen_urls.add(normalized_link)
-                                    normalized_urls[title] = normalized_link
-                                    
-                                    # Update the existing result
-                                    for i, existing in enumerate(results):
-                                        if existing["title"] == title:
-                                            results[i]["link"] = normalized_link
-                                            break
-                            else:
-                                # If we haven't seen this title, add it
-                                results.append({"title": title, "link": normalized_link})
-                                seen_urls.add(normalized_link)
-                                normalized_urls[title] = normalized_link
-                                print(f"Found anime: {title} - {normalized_link}")
-                except Exception as e:
-                    print(f"Error extracting anime info: {e}")
+            soup = BeautifulSoup(html, "lxml")
+            selectors = ((pattern.get("search_results"),) if pattern.get("search_results") else ()) + self.STATIC_CARD_SELECTORS
+            for selector in selectors:
+                elements = soup.select(selector)
+                if elements:
+                    break
+            else:
+                return []
             
-            print(f"Total results matching '{query}': {len(results)}")
-            return results
+            cards = []
+            for card in elements:
+                title = None
+                title_el = card.select_one(self.SEARCH_TITLE_SELECTOR)
+                if title_el:
+                    title = title_el.get_text(" ", strip=True)
+                if not title:
+                    img = card.find("img")
+                    if img:
+                        title = img.get("alt")
+                if not title:
+                    title = card.get("aria-label") or card.get_text(" ", strip=True)
+                
+                link = card.get("href")
+                if not link:
+                    a = card.find("a")
+                    if a:
+                        link = a.get("href")
+                cards.append({"title": title, "link": link})
+            
+            log.info(f"Found {len(cards)} results without a browser using selector {selector}")
+            return cards
         except Exception as e:
-            print(f"Error during search: {e}")
-            import traceback
-            traceback.print_exc()
+            log.info(f"Quick search failed, falling back to the browser: {e}")
             return []
     
+    def _browser_search_cards(self, search_url: str) -> List[Dict[str, Any]]:
+        """Load a search page in the browser and extract its result cards."""
+        log.info(f"Navigating to search URL: {search_url}")
+        self.navigate_to(search_url)
+        
+        # Wait for the DOM, then until the first result card shows up
+        log.info("Waiting for search results...")
+        self.current_page.wait_for_load_state("domcontentloaded", timeout=60000)
+        self._wait_for_any(".anime-card, .post-item, article, .card, .movie-item")
+        
+        self._debug_snapshot("search_page.png")
+        
+        # Try different selector combinations for search results
+        selector = self._first_matching_selector(self.SEARCH_CARD_SELECTORS)
+        if not selector:
+            log.info("No anime results found with any selector")
+            return []
+        
+        # Extract title and link of every card in a single evaluation
+        cards = self.current_page.eval_on_selector_all(selector, self.SEARCH_CARDS_JS, self.SEARCH_TITLE_SELECTOR)
+        log.debug(f"Found {len(cards)} elements with selector {selector}")
+        return cards
+    
     def extract_episodes(self, anime_url: str) -> List[Dict[str, Any]]:
         """Extract episodes list from an anime page."""
         try:
             # Initialize URL counter
             url_counter = 0
             
-            site_domain = self._extract_domain(anime_url)
-            pattern = self.site_patterns.get(site_domain)
+            site_domain, pattern = self._site_pattern(anime_url)
             
             if not pattern:
                 print(f"Warning: No predefined patterns for {site_domain} episodes. Using generic patterns.")
                 return []
             
-            self.navigate_to(anime_url)
-            
-            # Wait for page to load completely
-            print("Waiting for page to load completely...")
-            self.current_page.wait_for_load_state("networkidle", timeout=60000)
+            # Loop invariants for building absolute episode links
+            base_url = self._get_base_url(anime_url)
+            anime_slug = anime_url.split('/')[-2]
             
-            # Additional wait to ensure JavaScript has executed
-            print("Giving extra time for JavaScript to execute...")
-            time.sleep(5)
+            self.navigate_to(anime_url)
             
-            # Take a screenshot for debugging
-            self.current_page.screenshot(path="anime_page.png")
-            print("Screenshot saved as anime_page.png")
+            # Wait for the DOM, then until the first episode entry shows up
+            log.info("Waiting for episode list...")
+            self.current_page.wait_for_load_state("domcontentloaded", timeout=60000)
+            self._wait_for_any("a[onclick*='openEpisode'], .episode-card, a.overlay, .card a")
             
-            # Print page title for debugging
-            print(f"Page title: {self.current_page.title()}")
+            self._debug_snapshot("anime_page.png")
             
             # For witanime.cyou, episodes are in buttons with onclick handlers
             if "witanime.cyou" in anime_url:
                 print("Detected witanime.cyou, using special episode extraction...")
                 
                 # Look for episode elements with onclick attributes
-                episodes = []
-                
                 # Try different selectors for episode elements
-                selectors_to_try = [
-                    "a[onclick*='openEpisode']",
-                    ".episodes-card-container a.overlay",
-                    ".episodes-list-content a.overlay",
-                    ".episode-card a",
-                    "a.overlay",
-                    "[onclick*='openEpisode']",
-                    ".card a"
-                ]
-                
                 elements = []
-                for selector in selectors_to_try:
-                    print(f"Trying episode selector: {selector}")
-                    try:
-                        found_elements = self.current_page.query_selector_all(selector)
-                        if found_elements and len(found_elements) > 0:
-                            print(f"Found {len(found_elements)} episode elements with selector {selector}")
-                            elements = found_elements
-                            break
-                    except Exception as e:
-                        print(f"Error with selector {selector}: {e}")
+                selector = self._first_matching_selector(self.EPISODE_SELECTORS)
+                if selector:
+                    elements = self.current_page.eval_on_selector_all(selector, self.EPISODE_ROWS_JS)
+                    print(f"Found {len(elements)} episode elements with selector {selector}")
                 
                 if not elements:
                     print("No episode elements found with any selector")
-                    # Try to evaluate JavaScript to find episodes
+                    # Try any link with an openEpisode handler
                     try:
                         print("Attempting JavaScript evaluation to find episodes...")
-                        elements = self.current_page.evaluate("""
-                            () => {
-                                return Array.from(document.querySelectorAll('a')).filter(a => 
-                                    a.getAttribute('onclick') && a.getAttribute('onclick').includes('openEpisode')
-                                );
-                            }
-                        """)
+                        elements = self.current_page.eval_on_selector_all("a[onclick*='openEpisode']", self.EPISODE_ROWS_JS)
                         if elements:
                             print(f"Found {len(elements)} episodes using JavaScript evaluation")
                     except Exception as e:
@@ -641,41 +1274,19 @@ class SiteInteractor:
                     # Last resort - try to look for numbered elements
                     try:
                         print("Looking for numbered elements as last resort...")
-                        numbered_elements = self.current_page.evaluate("""
-                            () => {
-                                const results = [];
-                                const elements = document.querySelectorAll('*');
-                                for (const el of elements) {
-                                    const text = el.innerText || el.textContent;
-                                    if (text && /الحلقة\\s+\\d+/.test(text)) {
-                                        results.push({
-                                            element: el,
-                                            text: text,
-                                            number: text.match(/\\d+/)[0]
-                                        });
-                                    }
-                                }
-                                return results;
-                            }
-                        """)
+                        numbered_elements = self.current_page.evaluate(self.NUMBERED_EPISODES_JS)
                         if numbered_elements:
                             print(f"Found {len(numbered_elements)} numbered elements")
-                            # Process these elements differently
-                            for item in numbered_elements:
-                                episodes.append({
+                            # Process these elements differently, keyed by number to drop duplicates
+                            episode_dict = {
+                                _episode_key(item["number"]): {
                                     "number": item["number"],
                                     "link": anime_url  # We'll need special handling for these
-                                })
-                            
-                            # Remove duplicates by episode number
-                            unique_episodes = {}
-                            for ep in episodes:
-                                unique_episodes[ep["number"]] = ep
-                            
-                            episodes = list(unique_episodes.values())
-                            
+                                }
+                                for item in numbered_elements
+                            }
                             # Sort by episode number
-                            episodes.sort(key=lambda x: int(x["number"]) if x["number"].isdigit() else float('inf'))
+                            episodes = sorted(episode_dict.values(), key=_episode_sort_key)
                             return episodes
                     except Exception as e:
                         print(f"Numbered element search failed: {e}")
@@ -683,41 +1294,37 @@ class SiteInteractor:
                     return []
                 
                 # Process found elements
-                import base64
                 episode_dict = {}  # Use dictionary to avoid duplicates
                 
-                for element in elements:
+                for index, element in enumerate(elements):
                     try:
                         # Get the onclick attribute and extract the base64 parameter
-                        onclick = element.get_attribute("onclick")
+                        onclick = element["onclick"]
                         if onclick and "openEpisode" in onclick:
-                            # Extract the base64-encoded URL
-                            import re
-                            base64_match = re.search(r"openEpisode\('([^']+)'\)", onclick)
-                            if base64_match:
-                                base64_url = base64_match.group(1)
+                            # Extract the base64-encoded URL: openEpisode('<base64>')
+                            base64_url = onclick.partition("openEpisode('")[2].partition("')")[0]
+                            if not base64_url:
+                                # Unusual quoting or spacing, fall back to the regex
+                                base64_match = _OPEN_EP_RE.search(onclick)
+                                base64_url = base64_match.group(1) if base64_match else None
+                            if base64_url:
                                 try:
-                                    # Decode the URL
-                                    decoded_url = base64.b64decode(base64_url).decode('utf-8')
-                                    # Update on the same line instead of adding new lines
-                                    sys.stdout.write(f"\rProcessing URL: {decoded_url[:70]}..." + " " * 20)
-                                    sys.stdout.flush()
+                                    # Decode the URL (surplus padding is ignored, so missing padding never fails)
+                                    decoded_url = binascii.a2b_base64(base64_url + "===").decode('utf-8')
+                                    # Update on the same line, every few elements to keep terminal I/O down
+                                    if index % _PROGRESS_EVERY == 0:
+                                        sys.stdout.write(f"\rProcessing URL: {decoded_url[:70]}...{_CLEAR_EOL}")
+                                        sys.stdout.flush()
                                     
-                                    # Extract episode number from URL
-                                    ep_match = re.search(r'/episode/[^/]+-(\d+)/?$', decoded_url)
+                                    # Extract episode number from URL, else generate a sequential number
+                                    ep_match = _EP_NUMBER_RE.search(decoded_url)
                                     if ep_match:
-                                        episode_number = ep_match.group(1)
+                                        episode_number = ep_match.group(1) or ep_match.group(2)
                                     else:
-                                        # Try alternative pattern
-                                        ep_match = re.search(r'الحلقة-(\d+)', decoded_url)
-                                        if ep_match:
-                                            episode_number = ep_match.group(1)
-                                        else:
-                                            # Generate sequential number
-                                            episode_number = str(len(episode_dict) + 1)
+                                        episode_number = str(len(episode_dict) + 1)
                                     
                                     # Store in dictionary to avoid duplicates
-                                    episode_dict[episode_number] = {
+                                    episode_dict[_episode_key(episode_number)] = {
                                         "number": episode_number,
                                         "link": decoded_url
                                     }
@@ -725,27 +1332,24 @@ class SiteInteractor:
                                     print(f"Error decoding base64 URL: {decode_err}")
                         else:
                             # Try to find episode number in parent elements text content
-                            parent_text = element.evaluate("el => el.closest('.episode-card, .card')?.innerText")
+                            parent_text = element["cardText"]
                             if parent_text:
-                                ep_match = re.search(r'الحلقة\s*(\d+)', parent_text)
+                                ep_match = _EP_AR_RE.search(parent_text)
                                 if ep_match:
                                     episode_number = ep_match.group(1)
                                     # Construct URL based on pattern
-                                    episode_url = f"{self._get_base_url(anime_url)}/episode/{anime_url.split('/')[-2]}-{episode_number}/"
+                                    episode_url = f"{base_url}/episode/{anime_slug}-{episode_number}/"
                                     
                                     # Store in dictionary to avoid duplicates
-                                    episode_dict[episode_number] = {
+                                    episode_dict[_episode_key(episode_number)] = {
                                         "number": episode_number,
                                         "link": episode_url
                                     }
                     except Exception as e:
                         print(f"Error processing episode element: {e}")
                 
-                # Convert dictionary to list
-                episodes = list(episode_dict.values())
-                
-                # Sort episodes by number
-                episodes.sort(key=lambda x: int(x["number"]) if x["number"].isdigit() else float('inf'))
+                # Sort episodes by number (linear when the page already lists them in order)
+                episodes = sorted(episode_dict.values(), key=_episode_sort_key)
                 
                 # Print a newline to finish the URL processing status
                 print(f"\nProcessed {len(episodes)} episode URLs")
@@ -776,56 +1380,122 @@ class SiteInteractor:
                             episode_number = number
                         else:
                             # Try to extract the episode number from the URL or text
-                            match = re.search(r'الحلقة-(\d+)', link)
+                            match = _EP_AR_RE.search(link)
                             if match:
                                 episode_number = match.group(1)
                             else:
                                 # Try to extract from element text
-                                match = re.search(r'الحلقة\s*(\d+)', element.inner_text())
+                                match = _EP_AR_RE.search(element.inner_text())
                                 if match:
                                     episode_number = match.group(1)
                                 else:
                                     # Last resort - look for any number in text
-                                    match = re.search(r'(\d+)', number)
+                                    match = _DIGITS_RE.search(number)
                                     if match:
                                         episode_number = match.group(1)
                                     else:
                                         episode_number = "Unknown"
                         
                         if link and not link.startswith("http"):
-                            link = f"{self._get_base_url(anime_url)}{link}"
+                            link = f"{base_url}{link}"
                         
                         # Store in dictionary to avoid duplicates
-                        episode_dict[episode_number] = {
+                        episode_dict[_episode_key(episode_number)] = {
                             "number": episode_number,
                             "link": link
                         }
                 except Exception as e:
                     print(f"Error extracting episode info: {e}")
             
-            # Convert dictionary to list
-            episodes = list(episode_dict.values())
-            
-            # Sort episodes by number
-            episodes.sort(key=lambda x: int(x["number"]) if x["number"].isdigit() else float('inf'))
+            # Sort episodes by number (linear when the page already lists them in order)
+            episodes = sorted(episode_dict.values(), key=_episode_sort_key)
             
             # Print a newline to finish the URL processing status
             print(f"\nProcessed {len(episodes)} episode URLs")
             return episodes
         except Exception as e:
             print(f"Error extracting episodes: {e}")
-            import traceback
             traceback.print_exc()
             return []
     
+    def extract_episodes_batch(self, anime_urls: List[str], max_workers: int = BATCH_WORKERS) -> List[List[Dict[str, Any]]]:
+        """Extract the episode lists of several anime pages concurrently, in input order."""
+        return self._run_batch("extract_episodes", anime_urls, max_workers)
+    
+    def extract_download_links_batch(self, episode_urls: List[str], max_workers: int = BATCH_WORKERS) -> List[Optional[List[Dict[str, str]]]]:
+        """Extract the download links of several episode pages concurrently, in input order.
+        
+        An episode whose extraction raised gets None instead of a list."""
+        return self._run_batch("extract_download_links", episode_urls, max_workers)
+    
+    def _run_batch(self, method: str, urls: List[str], max_workers: int) -> List[Any]:
+        """Call the named extraction method on every URL, in input order.
+        
+        Playwright's sync API is bound to the thread that started it, so the calling
+        thread works through one slice of the URLs with this (usually warm) browser and
+        each extra worker drives its own SiteInteractor over another slice. A browser
+        launch costs about as much as a couple of pages, so a batch gets one worker
+        fewer than it has URLs."""
+        workers = min(max_workers, max(len(urls) - 1, 1))
+        indexed = list(enumerate(urls))
+        if workers <= 1:
+            return [result for _, result in self._batch_chunk(self, method, indexed)]
+        
+        # Workers start from this context's cookies and storage (a solved challenge or
+        # consent carries over) and in the browser mode the user chose
+        storage = None
+        if self.context:
+            try:
+                storage = self.context.storage_state()
+            except Exception as e:
+                log.debug(f"Could not copy the browser storage to batch workers: {e}")
+        
+        chunks = [indexed[i::workers] for i in range(workers)]
+        results: List[Any] = [None] * len(urls)
+        with ThreadPoolExecutor(max_workers=workers - 1) as executor:
+            futures = [executor.submit(self._extract_chunk, method, chunk, storage, self.headless)
+                       for chunk in chunks[1:]]
+            own = self._batch_chunk(self, method, chunks[0])
+            for chunk_results in [own] + [future.result() for future in futures]:
+                for index, result in chunk_results:
+                    results[index] = result
+        return results
+    
+    def _extract_chunk(self, method: str, chunk: List[tuple], storage_state: Optional[Dict[str, Any]],
+                       headless: bool) -> List[tuple]:
+        """Batch worker: extract (index, url) pairs with an interactor owned by this thread."""
+        interactor = SiteInteractor(self.database)
+        try:
+            try:
+                interactor.start_browser(headless=headless, storage_state=storage_state)
+            except Exception as e:
+                log.warning(f"Batch worker could not start a browser: {e}")
+                return [(index, None) for index, _ in chunk]
+            return self._batch_chunk(interactor, method, chunk)
+        finally:
+            interactor.close_browser()
+    
+    @staticmethod
+    def _batch_chunk(interactor: "SiteInteractor", method: str, chunk: List[tuple]) -> List[tuple]:
+        """Run one interactor's method over (index, url) pairs; a failing URL yields None."""
+        extract = getattr(interactor, method)
+        results = []
+        for index, url in chunk:
+            try:
+                results.append((index, extract(url)))
+            except Exception as e:
+                print(f"Error processing {url}: {e}")
+                results.append((index, None))
+        return results
+    
     def extract_download_links(self, episode_url: str) -> List[Dict[str, str]]:
         """Extract download links from an episode page."""
         try:
             # URL counter for progress tracking
             processed_urls = 0
             
-            site_domain = self._extract_domain(episode_url)
-            pattern = self.site_patterns.get(site_domain)
+            site_domain, pattern = self._site_pattern(episode_url)
+            base_url = self._get_base_url(episode_url)
             
             if not pattern:
                 print(f"Warning: No predefined patterns for {site_domain} download links. Using generic patterns.")
@@ -833,46 +1503,24 @@ class SiteInteractor:
             
             self.navigate_to(episode_url)
             
-            # Wait for page to load completely
-            print("Waiting for page to load completely...")
-            self.current_page.wait_for_load_state("networkidle", timeout=60000)
-            
-            # Additional wait to ensure JavaScript has executed
-            print("Giving extra time for JavaScript to execute...")
-            time.sleep(5)
+            # Wait for the DOM, then until either a download container or the
+            # download page button is attached (one locator over the whole union)
+            log.info("Waiting for download links...")
+            self.current_page.wait_for_load_state("domcontentloaded", timeout=60000)
+            self._wait_for_any(", ".join(self.DOWNLOAD_CONTAINER_SELECTORS + (pattern["download_page_link"],)))
             
-            # Take a screenshot for debugging
-            self.current_page.screenshot(path="episode_page.png")
-            print("Screenshot saved as episode_page.png")
-            
-            # Print page title for debugging
-            print(f"Page title: {self.current_page.title()}")
+            self._debug_snapshot("episode_page.png")
             
             # Special handling for witanime.cyou
             if "witanime.cyou" in episode_url:
                 print("Detected witanime.cyou, using special download link extraction...")
                 
                 # First try to look directly for the download container
-                download_container_selectors = [
-                    ".episode-download-container",
-                    ".content.episode-download-container",
-                    ".download-container",
-                    "[class*='download-container']",
-                    ".mwidget",
-                    ".quality-list"
-                ]
-                
                 download_container = None
-                for selector in download_container_selectors:
-                    print(f"Looking for download container with selector: {selector}")
-                    try:
-                        container = self.current_page.query_selector(selector)
-                        if container:
-                            download_container = container
-                            print(f"Found download container with selector: {selector}")
-                            break
-                    except Exception as e:
-                        print(f"Error finding download container with selector {selector}: {e}")
+                selector = self._first_matching_selector(self.DOWNLOAD_CONTAINER_SELECTORS)
+                if selector:
+                    download_container = self.current_page.query_selector(selector)
+                    print(f"Found download container with selector: {selector}")
                 
                 # If we found the download container, extract links directly
                 if download_container:
@@ -881,74 +1529,97 @@ class SiteInteractor:
                     # Extract download links with their server names
                     download_links = []
                     
-                    # Look for download links in the container
-                    link_selectors = [
-                        "a.download-link",
-                        "a.btn.download-link",
-                        "a.btn.btn-default.download-link",
-                        "a[data-index]",
-                        "a[class*='download']",
-                        "a.btn"
-                    ]
-                    
-                    for link_selector in link_selectors:
-                        try:
-                            links = download_container.query_selector_all(link_selector)
-                            if links and len(links) > 0:
-                                print(f"Found {len(links)} download links with selector {link_selector}")
+                    # Look for download links in the container (first selector group that matches)
+                    link_selector = self._first_matching_selector(self.DOWNLOAD_LINK_SELECTORS, root=download_container)
+                    if link_selector:
+                        link_infos = download_container.eval_on_selector_all(link_selector, self.DOWNLOAD_LINKS_JS)
+                        print(f"Found {len(link_infos)} download links with selector {link_selector}")
+                        
+                        # URLs the data-index links open, captured in-page on first need;
+                        # element handles are only needed for links that must really be clicked
+                        popup_urls = None
+                        link_handles = None
+                        
+                        for index, info in enumerate(link_infos):
+                            try:
+                                server_name = info["server"]
+                                data_index = info["dataIndex"]
+                                href = info["href"]
                                 
-                                for link in links:
-                                    try:
-                                        # Get the server name from the span.notice
-                                        notice = link.query_selector("span.notice")
-                                        server_name = notice.inner_text().strip() if notice else "Unknown Server"
-                                        
-                                        # Get the data-index or href
-                                        data_index = link.get_attribute("data-index")
-                                        href = link.get_attribute("href")
+                                if href and href != "#":
+                                    download_links.append({
+                                        "host": server_name,
+                                        "url": href if href.startswith("http") else f"{base_url}{href}"
+                                    })
+                                    print(f"Found direct download link for {server_name}: {href}")
+                                elif data_index:
+                                    # These are JavaScript-based links, we need to extract real URLs
+                                    print(f"Found JavaScript-based link for {server_name} with data-index {data_index}")
+                                    
+                                    # Most handlers just call window.open(url): capture those URLs
+                                    # for all links at once instead of opening a tab per link
+                                    if popup_urls is None:
+                                        page_url = self.current_page.url
+                                        try:
+                                            popup_urls = download_container.eval_on_selector_all(link_selector, self.CAPTURE_POPUP_URLS_JS)
+                                        except Exception as e:
+                                            log.warning(f"Could not capture popup URLs: {e}")
+                                            popup_urls = []
+                                    popup_url = self._pick_popup_url(popup_urls[index] if index < len(popup_urls) else None, server_name)
+                                    if popup_url:
+                                        processed_urls += 1
+                                        download_links.append({
+                                            "host": server_name,
+                                            "url": popup_url
+                                        })
+                                        continue
+                                    
+                                    # Otherwise click on the link to trigger the JavaScript
+                                    if link_handles is None:
+                                        # If a handler run during the capture still got the page
+                                        # to navigate, reload the episode page so the handles
+                                        # below belong to it and not to an unloading document
+                                        if self.current_page.url != page_url:
+                                            log.debug(f"Page navigated during popup capture, reloading {episode_url}")
+                                            try:
+                                                self.navigate_to(episode_url)
+                                                self._wait_for_any(selector)
+                                                download_container = self.current_page.query_selector(selector)
+                                            except Exception as e:
+                                                log.warning(f"Could not reload {episode_url}: {e}")
+                                                download_container = None
+                                            if not download_container:
+                                                # Don't reload once per remaining link; let the
+                                                # JavaScript evaluation below have a go instead
+                                                log.warning("Download container missing after reload, skipping the remaining clicks")
+                                                break
+                                        link_handles = download_container.query_selector_all(link_selector)
+                                    url_before = self.current_page.url
+                                    link_handles[index].click()
+                                    
+                                    # Wait until a new tab opens or the page navigates
+                                    new_page = self._wait_for_popup(url_before)
+                                    if new_page:
+                                        # A new tab was opened, get the URL; a context that
+                                        # spawned tabs is recycled on the next navigation
+                                        self._pages_since_recycle = self.CONTEXT_RECYCLE_PAGES
+                                        try:
+                                            new_url = new_page.url
+                                        finally:
+                                            self._close_tab(new_page)
+                                        # Update status on same line
+                                        sys.stdout.write(f"\rFound URL: {new_url[:70]}...{_CLEAR_EOL}")
+                                        sys.stdout.flush()
+                                        processed_urls += 1
                                         
-                                        if href and href != "#":
-                                            download_links.append({
-                                                "host": server_name,
-                                                "url": href if href.startswith("http") else f"{self._get_base_url(episode_url)}{href}"
-                                            })
-                                            print(f"Found direct download link for {server_name}: {href}")
-                                        elif data_index:
-                                            # These are JavaScript-based links, we need to extract real URLs
-                                            print(f"Found JavaScript-based link for {server_name} with data-index {data_index}")
-                                            
-                                            # Click on the link to trigger the JavaScript
-                                            link.click()
-                                            time.sleep(2)  # Wait for any popups or redirects
-                                            
-                                            # Check if a new tab was opened
-                                            pages = self.current_page.context.pages
-                                            if len(pages) > 1:
-                                                # A new tab was opened, get the URL
-                                                new_page = pages[-1]
-                                                new_url = new_page.url
-                                                # Update status on same line
-                                                sys.stdout.write(f"\rFound URL: {new_url[:70]}..." + " " * 20)
-                                                sys.stdout.flush()
-                                                processed_urls += 1
-                                                
-                                                download_links.append({
-                                                    "host": server_name,
-                                                    "url": new_url
-                                                })
-                                                
-                                                # Close the new tab
-                                                new_page.close()
-                                            else:
-                                                print(f"No new tab was opened for {server_name}")
-                                    except Exception as e:
-                                        print(f"Error processing download link: {e}")
-                                
-                                # If we found links, no need to try other selectors
-                                if download_links:
-                                    break
-                        except Exception as e:
-                            print(f"Error with link selector {link_selector}: {e}")
+                                        download_links.append({
+                                            "host": server_name,
+                                            "url": new_url
+                                        })
+                                    else:
+                                        print(f"No new tab was opened for {server_name}")
+                            except Exception as e:
+                                print(f"Error processing download link: {e}")
                     
                     # If we found download links, return them
                     if download_links:
@@ -993,7 +1664,7 @@ class SiteInteractor:
                             if info['href'] and info['href'] != "#":
                                 download_links.append({
                                     "host": server_name,
-                                    "url": info['href'] if info['href'].startswith("http") else f"{self._get_base_url(episode_url)}{info['href']}"
+                                    "url": info['href'] if info['href'].startswith("http") else f"{base_url}{info['href']}"
                                 })
                             elif info['dataIndex']:
                                 # These are JavaScript-based links, we might need to click them
@@ -1013,27 +1684,15 @@ class SiteInteractor:
                 
                 # If we still haven't found download links, try to find the download button
                 # and navigate to the download page
-                download_button_selectors = [
-                    "a:has-text('تحميل الحلقة')",
-                    "a:has-text('تحميل')",
-                    ".btn-site:has-text('تحميل')",
-                    ".btn-site",
-                    "a.btn-site",
-                    ".episodes-buttons-list a",
-                    ".episode-buttons-container a"
-                ]
-                
                 download_button = None
-                for selector in download_button_selectors:
-                    print(f"Looking for download button with selector: {selector}")
+                for group in (self.DOWNLOAD_BUTTON_TEXT_SELECTORS, self.DOWNLOAD_BUTTON_SELECTORS):
                     try:
-                        button = self.current_page.query_selector(selector)
-                        if button:
-                            download_button = button
-                            print(f"Found download button with selector: {selector}")
+                        download_button = self.current_page.query_selector(", ".join(group))
+                        if download_button:
+                            print("Found download button")
                             break
                     except Exception as e:
-                        print(f"Error finding download button with selector {selector}: {e}")
+                        print(f"Error finding download button: {e}")
                 
                 if not download_button:
                     print("Could not find download button with any selector")
@@ -1066,15 +1725,11 @@ class SiteInteractor:
                     with self.current_page.expect_navigation(timeout=60000):
                         download_button.click()
                     
-                    # Wait after navigation
-                    self.current_page.wait_for_load_state("networkidle", timeout=60000)
-                    time.sleep(5)
+                    # Wait after navigation until the first server link is attached
+                    self.current_page.wait_for_load_state("domcontentloaded", timeout=60000)
+                    self._wait_for_any(", ".join(self.DOWNLOAD_SERVER_SELECTORS))
                     
-                    # Take another screenshot
-                    self.current_page.screenshot(path="download_page.png")
-                    print("Screenshot saved as download_page.png")
-                    
-                    print(f"New page title: {self.current_page.title()}")
+                    self._debug_snapshot("download_page.png")
                 except Exception as e:
                     print(f"Error clicking download button: {e}")
                     
@@ -1083,55 +1738,29 @@ class SiteInteractor:
                         download_url = download_button.get_attribute("href")
                         if download_url:
                             if not download_url.startswith("http"):
-                                download_url = f"{self._get_base_url(episode_url)}{download_url}"
+                                download_url = f"{base_url}{download_url}"
                             print(f"Navigating directly to: {download_url}")
                             self.navigate_to(download_url)
                     else:
                         return []
                 
                 # Now try to find the download servers on the download page
-                server_selectors = [
-                    ".download-servers a.dashboard-button",
-                    ".download-servers a",
-                    ".server-list a",
-                    ".server-item a",
-                    "a.dashboard-button",
-                    "a[href*='drive.google']",
-                    "a[href*='mediafire']",
-                    ".quality-list a",
-                    "a.download-link",
-                    "a[class*='download']"
-                ]
-                
                 servers = []
-                for selector in server_selectors:
-                    print(f"Looking for servers with selector: {selector}")
-                    try:
-                        found_servers = self.current_page.query_selector_all(selector)
-                        if found_servers and len(found_servers) > 0:
-                            servers = found_servers
-                            print(f"Found {len(servers)} servers with selector {selector}")
-                            break
-                    except Exception as e:
-                        print(f"Error finding servers with selector {selector}: {e}")
+                selector = self._first_matching_selector(self.DOWNLOAD_SERVER_SELECTORS)
+                if selector:
+                    servers = self.current_page.eval_on_selector_all(selector, self.SERVER_LINKS_JS)
+                    print(f"Found {len(servers)} servers with selector {selector}")
                 
                 if not servers:
                     print("Could not find any download servers")
-                    # Try JavaScript evaluation
+                    # Fall back to any link pointing at a known file host
                     try:
                         print("Attempting JavaScript evaluation to find servers...")
-                        servers = self.current_page.evaluate("""
-                            () => {
-                                return Array.from(document.querySelectorAll('a')).filter(a => {
-                                    const href = a.getAttribute('href') || '';
-                                    return href.includes('drive.google') || 
-                                           href.includes('mediafire') ||
-                                           href.includes('mega') ||
-                                           href.includes('solidfiles') ||
-                                           href.includes('mp4upload');
-                                });
-                            }
-                        """)
+                        servers = self.current_page.eval_on_selector_all(
+                            "a[href*='drive.google'], a[href*='mediafire'], a[href*='mega'], "
+                            "a[href*='solidfiles'], a[href*='mp4upload']",
+                            self.SERVER_LINKS_JS
+                        )
                         if servers:
                             print(f"Found {len(servers)} servers using JavaScript evaluation")
                     except Exception as e:
@@ -1145,36 +1774,16 @@ class SiteInteractor:
                 
                 for server in servers:
                     try:
-                        url = server.get_attribute("href")
+                        url = server["href"]
                         if not url:
                             continue
                         
-                        # Get server name/text
-                        text = server.inner_text().strip()
-                        if not text:
-                            # Try to extract from elements inside
-                            text_elem = server.query_selector(".dashboard-button-text, .server-name, .notice")
-                            if text_elem:
-                                text = text_elem.inner_text().strip()
+                        # Server name/text (own text, else a label element inside)
+                        text = server["text"]
                         
                         # If still no text, try to determine from URL
                         if not text:
-                            if "drive.google" in url:
-                                text = "Google Drive"
-                            elif "mediafire" in url:
-                                text = "MediaFire"
-                            elif "mega" in url:
-                                text = "MEGA"
-                            elif "solidfiles" in url:
-                                text = "SolidFiles"
-                            elif "mp4upload" in url:
-                                text = "MP4Upload"
-                            elif "4shared" in url:
-                                text = "4shared"
-                            elif "yandex" in url:
-                                text = "Yandex"
-                            else:
-                                text = "Unknown Server"
+                            text = next((label for needle, label in _HOST_LABELS if needle in url), "Unknown Server")
                         
                         download_links.append({
                             "host": text,
@@ -1229,10 +1838,47 @@ class SiteInteractor:
             return download_links
         except Exception as e:
             print(f"Error extracting download links: {e}")
-            import traceback
             traceback.print_exc()
             return []
     
+    def _debug_snapshot(self, path: str):
+        """Save a screenshot and log the page title, in debug mode only."""
+        if not self.debug:
+            return
+        try:
+            self.current_page.screenshot(path=path)
+            log.debug(f"Screenshot saved as {path}")
+            log.debug(f"Page title: {self.current_page.title()}")
+        except Exception as e:
+            log.debug(f"Could not capture {path}: {e}")
+    
+    def _wait_for_any(self, selector: str, timeout: int = 15000, settle: bool = True) -> bool:
+        """Wait until an element matching selector is attached.
+        
+        If none appears in time, give the page a bounded chance to settle (networkidle,
+        unless settle is False) and carry on with what has loaded. Returns whether the
+        selector matched."""
+        try:
+            self.current_page.locator(selector).first.wait_for(state="attached", timeout=timeout)
+            return True
+        except Exception:
+            log.info(f"Timed out waiting for {selector}")
+        if not settle:
+            return False
+        try:
+            self.current_page.wait_for_load_state("networkidle", timeout=10000)
+        except Exception:
+            pass
+        return False
+    
+    def _first_matching_selector(self, selectors: List[str], root=None) -> Optional[str]:
+        """Return the first selector that matches anything on the current page (or inside root), or None."""
+        try:
+            return self.current_page.evaluate(self.PROBE_SELECTORS_JS, {"root": root, "sels": list(selectors)})
+        except Exception as e:
+            log.warning(f"Error probing selectors: {e}")
+            return None
+    
     def _generic_search(self, site_url: str, query: str) -> List[Dict[str, Any]]:
         """Generic search method when no patterns are available."""
         print("Using generic search method. Results may be less accurate.")
@@ -1241,77 +1887,73 @@ class SiteInteractor:
         self.navigate_to(site_url)
         
         # Look for common search elements
-        search_box = None
-        for selector in ["input[type='search']", "input[name='s']", ".search-field", "input.search-input"]:
-            search_box = self.current_page.query_selector(selector)
-            if search_box:
-                break
+        search_box = self._first_matching_selector(["input[type='search']", "input[name='s']", ".search-field", "input.search-input"])
         
         if not search_box:
             print("Could not find search box")
             return []
         
         # Fill in the search box
-        search_box.fill(query)
+        self.current_page.fill(search_box, query)
         
         # Try to submit the form
-        form = search_box.evaluate("el => el.closest('form')")
-        if form:
-            with self.current_page.expect_navigation():
-                self.current_page.evaluate("form => form.submit()", form)
-        else:
-            # If no form, try pressing Enter
-            with self.current_page.expect_navigation():
-                search_box.press("Enter")
+        with self.current_page.expect_navigation():
+            if not self.current_page.evaluate(self.SUBMIT_FORM_JS, search_box):
+                # If no form, try pressing Enter
+                self.current_page.press(search_box, "Enter")
+        
+        # Wait for the first result item rather than for the network to go quiet;
+        # if none shows up there is nothing to extract, so don't wait for networkidle
+        # either (ad-heavy pages rarely reach it)
+        item_selectors = [".anime-item", ".anime-card", ".show-card", "article", ".post"]
+        self.current_page.wait_for_load_state("domcontentloaded", timeout=10000)
+        if not self._wait_for_any(", ".join(item_selectors), settle=False):
+            print("No search results found")
+            return []
         
-        # Wait for results to load
-        self.current_page.wait_for_load_state("networkidle")
+        # Try common patterns for anime items, all extracted in one round-trip
+        try:
+            results = self.current_page.evaluate(self.GENERIC_ITEMS_JS, {
+                "itemSels": item_selectors,
+                "titleSels": ["h2", "h3", ".title", ".name"],
+            })
+        except Exception as e:
+            log.warning(f"Error extracting search results: {e}")
+            return []
         
-        # Try common patterns for anime items
-        results = []
-        for selector in [".anime-item", ".anime-card", ".show-card", "article", ".post"]:
-            items = self.current_page.query_selector_all(selector)
-            if items:
-                for item in items:
-                    title_elem = None
-                    for title_sel in ["h2", "h3", ".title", ".name"]:
-                        title_elem = item.query_selector(title_sel)
-                        if title_elem:
-                            break
-                    
-                    link_elem = item.query_selector("a")
-                    
-                    if title_elem and link_elem:
-                        title = title_elem.inner_text()
-                        link = link_elem.get_attribute("href")
-                        
-                        if link and not link.startswith("http"):
-                            link = f"{self._get_base_url(site_url)}{link}"
-                        
-                        results.append({"title": title, "link": link})
-                
-                break  # Stop if we found some items
+        base_url = self._get_base_url(site_url)
+        for result in results:
+            link = result["link"]
+            if link and not link.startswith("http"):
+                result["link"] = f"{base_url}{link}"
         
         return results
     
-    def _extract_domain(self, url: str) -> str:
+    def _site_pattern(self, url: str):
+        """Return (domain, site pattern or None) for a URL; the domain lookup is cached."""
+        site_domain = self._extract_domain(url)
+        return site_domain, self.site_patterns.get(site_domain)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _extract_domain(url: str) -> str:
         """Extract the domain from a URL."""
         # Remove the @ symbol if present at the beginning of the URL
         if url.startswith('@'):
             url = url[1:]
             
-        import re
-        match = re.search(r'https?://([^/]+)', url)
+        match = _DOMAIN_RE.search(url)
         return match.group(1) if match else url
     
-    def _get_base_url(self, url: str) -> str:
+    @staticmethod
+    @functools.lru_cache(maxsize=256)
+    def _get_base_url(url: str) -> str:
         """Get the base URL from a full URL."""
         # Remove the @ symbol if present at the beginning of the URL
         if url.startswith('@'):
             url = url[1:]
             
-        import re
-        match = re.search(r'(https?://[^/]+)', url)
+        match = _BASE_URL_RE.search(url)
         return match.group(1) if match else ""
 
     def _handle_javascript_download_link(self, link_info: Dict[str, Any]) -> str:
@@ -1323,63 +1965,49 @@ class SiteInteractor:
         if not data_index:
             return ""
             
-        sys.stdout.write(f"\rHandling JavaScript link for {link_info.get('host')} with index {data_index}..." + " " * 20)
+        sys.stdout.write(f"\rHandling JavaScript link for {link_info.get('host')} with index {data_index}...{_CLEAR_EOL}")
         sys.stdout.flush()
         
         try:
             # Execute JavaScript to simulate clicking the link with this data-index
-            result = self.current_page.evaluate(f"""
-                () => {{
-                    const link = document.querySelector('a.download-link[data-index="{data_index}"]');
-                    if (!link) return null;
-                    
-                    // Get the full URL from the link (might be set by JavaScript)
-                    if (link.href && link.href !== "#" && !link.href.startsWith("javascript")) {{
-                        return link.href;
-                    }}
-                    
-                    // Try to dispatch a click event
-                    link.click();
-                    return "clicked";
-                }}
-            """)
+            url_before = self.current_page.url
+            result = self.current_page.evaluate(self.CLICK_DOWNLOAD_LINK_JS, data_index)
             
             if result and result != "clicked":
-                sys.stdout.write(f"\rGot direct URL: {result[:70]}..." + " " * 20 + "\n")
+                sys.stdout.write(f"\rGot direct URL: {result[:70]}...{_CLEAR_EOL}\n")
                 sys.stdout.flush()
                 return result
             
-            # If we've clicked the link, check if a new tab was opened
-            time.sleep(2)  # Wait for any redirects or new tabs
-            
-            pages = self.current_page.context.pages
-            if len(pages) > 1:
-                # A new tab was opened, get the URL
-                new_page = pages[-1]
-                new_url = new_page.url
-                sys.stdout.write(f"\rFound URL in new tab: {new_url[:70]}..." + " " * 20 + "\n")
+            # If we've clicked the link, wait until a new tab opens or the page navigates
+            new_page = self._wait_for_popup(url_before) if result else None
+            if new_page:
+                # A new tab was opened, get the URL; a context that spawned
+                # tabs is recycled on the next navigation
+                self._pages_since_recycle = self.CONTEXT_RECYCLE_PAGES
+                try:
+                    new_url = new_page.url
+                finally:
+                    self._close_tab(new_page)
+                sys.stdout.write(f"\rFound URL in new tab: {new_url[:70]}...{_CLEAR_EOL}\n")
                 sys.stdout.flush()
-                
-                # Close the new tab
-                new_page.close()
                 return new_url
                 
             # Check if the current page URL has changed
             current_url = self.current_page.url
             if current_url != link_info.get("original_page_url", ""):
-                sys.stdout.write(f"\rPage redirected to: {current_url[:70]}..." + " " * 20 + "\n")
+                sys.stdout.write(f"\rPage redirected to: {current_url[:70]}...{_CLEAR_EOL}\n")
                 sys.stdout.flush()
                 
                 # Go back to the original page
                 self.navigate_to(link_info.get("original_page_url", ""))
                 return current_url
                 
-            sys.stdout.write("\rNo URL change detected" + " " * 50 + "\n")
+            sys.stdout.write(f"\rNo URL change detected{_CLEAR_EOL}\n")
             sys.stdout.flush()
             return ""
             
         except Exception as e:
-            sys.stdout.write(f"\rError handling JavaScript link: {str(e)[:70]}..." + " " * 20 + "\n")
+            sys.stdout.write(f"\rError handling JavaScript link: {str(e)[:70]}...{_CLEAR_EOL}\n")
             sys.stdout.flush()
             return ""
 
@@ -1387,8 +2015,38 @@ class SiteInteractor:
 class PatternRecognition:
     """Handles pattern recognition for identifying elements on anime sites."""
     
+    # Match counts for {category: [selectors]} in one round-trip (-1 for invalid selectors).
+    # Bare tag, class and id selectors skip the selector parser; only .length is read,
+    # so the live collections are safe to use.
+    COUNT_SELECTORS_JS = """
+        (groups) => {
+            const count = (s) => {
+                if (/^[a-z][a-z0-9]*$/i.test(s)) return document.getElementsByTagName(s).length;
+                if (/^\\.[\\w-]+$/.test(s)) return document.getElementsByClassName(s.slice(1)).length;
+                if (/^#[\\w-]+$/.test(s)) return document.getElementById(s.slice(1)) ? 1 : 0;
+                try { return document.querySelectorAll(s).length; } catch (e) { return -1; }
+            };
+            return Object.fromEntries(Object.entries(groups).map(([key, sels]) => [key, sels.map(count)]));
+        }
+    """
+    
+    # Element categories analyze_page looks for, per purpose
+    PURPOSE_CATEGORIES = {
+        "search": ("search_box", "search_button"),
+        "anime_list": ("anime_items", "title"),
+        "episode_list": ("episode_items",),
+        "download_page": ("download_buttons", "server_items"),
+    }
+    
+    # Seconds a site pattern that passed validation is trusted without re-probing the page
+    PATTERN_RECHECK_INTERVAL = 60.0
+    
     def __init__(self, database: AnimeDatabase):
         self.database = database
+        # Session cache of stored patterns (site -> pattern) and of when each
+        # (site, purpose) pattern was last validated against a page
+        self._patterns: Dict[str, Optional[Dict[str, Any]]] = {}
+        self._validated: Dict[tuple, float] = {}
         # Common patterns for anime sites
         self.common_patterns = {
             "search_box": [
@@ -1446,72 +2104,58 @@ class PatternRecognition:
             ]
         }
     
-    def learn_site_structure(self, site_url: str, page: Page):
+    def learn_site_structure(self, site_url: str, page: "Page"):
         """Learn and store the structure of a site."""
         print(f"Learning site structure for {site_url}...")
         
-        pattern = {
-            "search_box": self._find_element(page, self.common_patterns["search_box"]),
-            "search_button": self._find_element(page, self.common_patterns["search_button"]),
-            "anime_items": self._find_element(page, self.common_patterns["anime_items"]),
-            "title": self._find_element(page, self.common_patterns["title"]),
-            "episode_items": self._find_element(page, self.common_patterns["episode_items"]),
-            "download_buttons": self._find_element(page, self.common_patterns["download_buttons"]),
-            "server_items": self._find_element(page, self.common_patterns["server_items"])
-        }
+        pattern = self._find_elements(page, self.common_patterns)
         
         # Store learned pattern
-        self.database.add_navigation_pattern(site_url, pattern)
+        self._store_pattern(site_url, pattern)
         print(f"Site structure learned and stored for {site_url}")
         
         return pattern
     
-    def _find_element(self, page: Page, selectors: List[str]) -> Dict[str, Any]:
+    def _get_pattern(self, site_url: str) -> Optional[Dict[str, Any]]:
+        """The stored pattern for a site, read from the database once per session."""
+        if site_url not in self._patterns:
+            self._patterns[site_url] = self.database.get_navigation_pattern(site_url)
+        return self._patterns[site_url]
+    
+    def _store_pattern(self, site_url: str, pattern: Dict[str, Any]):
+        """Save a site's pattern and drop the site's validation timestamps."""
+        self.database.add_navigation_pattern(site_url, pattern)
+        self._patterns[site_url] = pattern
+        for key in [key for key in self._validated if key[0] == site_url]:
+            del self._validated[key]
+    
+    def _find_element(self, page: "Page", selectors: List[str]) -> Dict[str, Any]:
         """Find an element on a page using a list of possible selectors."""
-        for selector in selectors:
-            try:
-                count = page.evaluate(f"document.querySelectorAll('{selector}').length")
+        return self._find_elements(page, {"element": selectors})["element"]
+    
+    def _find_elements(self, page: "Page", groups: Dict[str, List[str]]) -> Dict[str, Dict[str, Any]]:
+        """Find the first matching selector of every {category: selectors} group in one evaluation."""
+        try:
+            counts = page.evaluate(self.COUNT_SELECTORS_JS, {key: list(sels) for key, sels in groups.items()})
+        except Exception:
+            counts = {}
+        
+        found = {}
+        for key, selectors in groups.items():
+            found[key] = {"selector": None, "confidence": 0, "count": 0}
+            for selector, count in zip(selectors, counts.get(key, ())):
                 if count > 0:
-                    return {"selector": selector, "confidence": min(count/5 + 0.5, 0.95), "count": count}
-            except Exception:
-                continue
-        
-        return {"selector": None, "confidence": 0, "count": 0}
+                    found[key] = {"selector": selector, "confidence": min(count/5 + 0.5, 0.95), "count": count}
+                    break
+        return found
     
-    def analyze_page(self, page: Page, purpose: str) -> Dict[str, Any]:
+    def analyze_page(self, page: "Page", purpose: str) -> Dict[str, Any]:
         """Analyze a page to find important elements based on the purpose."""
         print(f"Analyzing page for {purpose}...")
         
-        if purpose == "search":
-            result = {
-                "search_box": self._find_element(page, self.common_patterns["search_box"]),
-                "search_button": self._find_element(page, self.common_patterns["search_button"])
-            }
-        elif purpose == "anime_list":
-            result = {
-                "anime_items": self._find_element(page, self.common_patterns["anime_items"]),
-                "title": self._find_element(page, self.common_patterns["title"])
-            }
-        elif purpose == "episode_list":
-            result = {
-                "episode_items": self._find_element(page, self.common_patterns["episode_items"])
-            }
-        elif purpose == "download_page":
-            result = {
-                "download_buttons": self._find_element(page, self.common_patterns["download_buttons"]),
-                "server_items": self._find_element(page, self.common_patterns["server_items"])
-            }
-        else:
-            # Analyze everything
-            result = {
-                "search_box": self._find_element(page, self.common_patterns["search_box"]),
-                "search_button": self._find_element(page, self.common_patterns["search_button"]),
-                "anime_items": self._find_element(page, self.common_patterns["anime_items"]),
-                "title": self._find_element(page, self.common_patterns["title"]),
-                "episode_items": self._find_element(page, self.common_patterns["episode_items"]),
-                "download_buttons": self._find_element(page, self.common_patterns["download_buttons"]),
-                "server_items": self._find_element(page, self.common_patterns["server_items"])
-            }
+        # Unknown purposes analyze everything
+        categories = self.PURPOSE_CATEGORIES.get(purpose, self.common_patterns.keys())
+        result = self._find_elements(page, {key: self.common_patterns[key] for key in categories})
         
         # Print what was found
         found_elements = [k for k, v in result.items() if v["selector"] is not None]
@@ -1521,7 +2165,7 @@ class PatternRecognition:
     
     def update_site_pattern(self, site_url: str, new_pattern: Dict[str, Any]):
         """Update the stored pattern for a site with new information."""
-        existing_pattern = self.database.get_navigation_pattern(site_url)
+        existing_pattern = self._get_pattern(site_url)
         
         if existing_pattern:
             # Merge existing pattern with new information
@@ -1529,33 +2173,34 @@ class PatternRecognition:
                 if value["selector"] is not None and value["confidence"] > 0.5:
                     existing_pattern[key] = value
             
-            self.database.add_navigation_pattern(site_url, existing_pattern)
+            self._store_pattern(site_url, existing_pattern)
         else:
             # Store new pattern
-            self.database.add_navigation_pattern(site_url, new_pattern)
+            self._store_pattern(site_url, new_pattern)
     
-    def adapt_to_changes(self, site_url: str, page: Page, purpose: str) -> Dict[str, Any]:
+    def adapt_to_changes(self, site_url: str, page: "Page", purpose: str) -> Dict[str, Any]:
         """Analyze page and adapt to changes if the current pattern doesn't work."""
-        existing_pattern = self.database.get_navigation_pattern(site_url)
+        existing_pattern = self._get_pattern(site_url)
         
         if not existing_pattern:
             # Learn from scratch
             return self.learn_site_structure(site_url, page)
         
-        # Check if existing pattern still works
-        pattern_works = True
-        for key, value in existing_pattern.items():
-            if value["selector"]:
-                try:
-                    count = page.evaluate(f"document.querySelectorAll('{value['selector']}').length")
-                    if count == 0:
-                        pattern_works = False
-                        break
-                except Exception:
-                    pattern_works = False
-                    break
+        # Trust a pattern that was validated for this purpose moments ago
+        checked_at = self._validated.get((site_url, purpose))
+        if checked_at is not None and time.monotonic() - checked_at < self.PATTERN_RECHECK_INTERVAL:
+            return existing_pattern
+        
+        # Check if existing pattern still works (every stored selector still matches)
+        stored = {key: [value["selector"]] for key, value in existing_pattern.items() if value["selector"]}
+        try:
+            counts = page.evaluate(self.COUNT_SELECTORS_JS, stored) if stored else {}
+            pattern_works = all(count[0] > 0 for count in counts.values())
+        except Exception:
+            pattern_works = False
         
         if pattern_works:
+            self._validated[(site_url, purpose)] = time.monotonic()
             return existing_pattern
         
         # Pattern doesn't work, analyze and adapt
@@ -1569,9 +2214,69 @@ class PatternRecognition:
 class DownloadManager:
     """Handles the downloading of anime files from various sources."""
     
-    def __init__(self, download_dir: Path = DOWNLOAD_DIR):
+    # Queue items downloaded at the same time by process_queue
+    MAX_PARALLEL_DOWNLOADS = 4
+    
+    # Transfers from the same host at once; file hosts throttle clients that open more
+    MAX_DOWNLOADS_PER_HOST = 2
+    
+    # Bulk copy in large chunks and redraw progress bars at most this often (seconds)
+    DOWNLOAD_CHUNK_SIZE = 1 << 18
+    WRITE_BUFFER_SIZE = 1 << 20
+    PROGRESS_INTERVAL = 0.25
+    
+    # Files smaller than this are copied without a progress bar
+    PROGRESS_MIN_SIZE = 1 << 20
+    
+    # Files at least this big are fetched as several byte ranges at once when the server
+    # accepts Range requests (hosts often cap the speed of each connection). Every range
+    # connection takes a host slot, so with MAX_DOWNLOADS_PER_HOST = 2 a file is split in
+    # two, and only while no other transfer from its host is running
+    SEGMENT_MIN_SIZE = 8 << 20
+    DOWNLOAD_SEGMENTS = MAX_DOWNLOADS_PER_HOST
+    
+    # Every progress bar state, indexed by filled cells, so redraws don't rebuild them
+    PROGRESS_BARS = tuple('#' * i + ' ' * (20 - i) for i in range(21))
+    BLOCK_PROGRESS_BARS = tuple('█' * i + ' ' * (50 - i) for i in range(51))
+    
+    # Queue item states
+    QUEUED, DOWNLOADING, COMPLETED, FAILED = range(4)
+    
+    # Download method per file-host domain (without "www."), looked up by URL netloc
+    HOST_HANDLERS = {
+        "drive.google.com": "_download_from_google_drive",
+        "docs.google.com": "_download_from_google_drive",
+        "mediafire.com": "_download_from_mediafire",
+        "mega.nz": "_download_from_mega",
+        "mega.co.nz": "_download_from_mega",
+        "dropbox.com": "_download_from_dropbox",
+        "dl.dropboxusercontent.com": "_download_from_dropbox",
+        "mp4upload.com": "_download_from_mp4upload",
+        "solidfiles.com": "_download_from_solidfiles",
+        "4shared.com": "_download_from_4shared",
+    }
+    
+    def __init__(self, download_dir: Path = DOWNLOAD_DIR, database: Optional[AnimeDatabase] = None):
         self.download_dir = download_dir
-        self.download_queue = []
+        # Caches the direct links found on file host pages, when given
+        self.database = database
+        # The download queue, one column per field; item i is (_q_link[i], _q_title[i], ...)
+        self._q_link: List[Dict[str, str]] = []
+        self._q_title: List[str] = []
+        self._q_episode: List[str] = []
+        self._q_status = array.array('b')
+        self._q_progress = array.array('i')
+        # Items before this index have all been handed to process_queue
+        self._q_next = 0
+        # Off while process_queue runs several downloads at once; their bars would interleave
+        self.show_progress = True
+        # Serializes queue status updates and console output between download threads
+        self._lock = threading.Lock()
+        # Each download thread keeps its own warm browser for hosts that need one
+        # (Playwright's sync API can't share a browser across threads)
+        self._local = threading.local()
+        # One semaphore per host, bounding parallel transfers from it
+        self._host_slots: Dict[str, threading.BoundedSemaphore] = {}
         # Import additional required modules
         try:
             import requests
@@ -1581,45 +2286,145 @@ class DownloadManager:
             os.system("pip install requests")
             import requests
             self.requests = requests
+        
+        self.session = self._create_session()
+    
+    def _create_session(self):
+        """Shared HTTP session: pooled keep-alive connections, retried on transient errors."""
+        from requests.adapters import HTTPAdapter
+        from urllib3.util.retry import Retry
+        
+        session = self.requests.Session()
+        # Browser-like defaults; individual requests only add what differs
+        session.headers.update(HEADERS)
+        session.headers["Accept-Language"] = "en-US,en;q=0.5"
+        adapter = HTTPAdapter(
+            pool_connections=20,
+            pool_maxsize=50,
+            # Rate limits (429) and transient server errors are retried with exponential
+            # backoff, waiting as long as a Retry-After header asks
+            max_retries=Retry(
+                total=5,
+                backoff_factor=0.5,
+                status_forcelist=[429, 500, 502, 503, 504],
+                respect_retry_after_header=True,
+            )
+        )
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        return session
+    
+    def _host_slot(self, url: str) -> threading.BoundedSemaphore:
+        """The semaphore that bounds concurrent transfers from url's host."""
+        host = urllib.parse.urlsplit(url).hostname or ""
+        with self._lock:
+            slot = self._host_slots.get(host)
+            if slot is None:
+                slot = self._host_slots[host] = threading.BoundedSemaphore(self.MAX_DOWNLOADS_PER_HOST)
+        return slot
     
     def add_to_queue(self, link: Dict[str, str], anime_title: str, episode: str):
         """Add a download link to the queue."""
-        self.download_queue.append({
-            "link": link,
-            "anime_title": anime_title,
-            "episode": episode,
-            "status": "queued",
-            "progress": 0
-        })
+        with self._lock:
+            self._q_link.append(link)
+            self._q_title.append(anime_title)
+            self._q_episode.append(episode)
+            self._q_status.append(self.QUEUED)
+            self._q_progress.append(0)
         print(f"Added to queue: {anime_title} - Episode {episode} from {link['host']}")
     
-    def process_queue(self):
-        """Process the download queue."""
-        for item in self.download_queue:
-            if item["status"] == "queued":
-                print(f"\nDownloading {item['anime_title']} - Episode {item['episode']} from {item['link']['host']}")
-                item["status"] = "downloading"
-                
-                # Create anime directory if it doesn't exist
-                anime_dir = self.download_dir / item["anime_title"].replace(':', ' -').replace('/', '-')
-                anime_dir.mkdir(exist_ok=True, parents=True)
-                
-                # Download file
-                filename = f"{item['anime_title']}_Episode_{item['episode']}.mp4"
-                destination = anime_dir / filename
-                
-                success = self._download_file(
-                    item["link"], 
-                    destination
-                )
-                
-                if success:
-                    item["status"] = "completed"
-                    item["progress"] = 100
-                    print(f"Download completed: {destination}")
-                else:
-                    item["status"] = "failed"
-                    print(f"Download failed: {item['link']['url']}")
+    def process_queue(self, max_workers: int = MAX_PARALLEL_DOWNLOADS):
+        """Process the download queue, downloading up to max_workers items at once."""
+        with self._lock:
+            # Only items added since the last run can still be queued
+            pending = range(self._q_next, len(self._q_status))
+            self._q_next = len(self._q_status)
+            for i in pending:
+                self._q_status[i] = self.DOWNLOADING
+        
+        self._run_parallel(self._process_one, list(pending), max_workers)
+    
+    def download_episodes(self, jobs: List[tuple], max_workers: int = MAX_PARALLEL_DOWNLOADS) -> List[bool]:
+        """Download several episodes at once, returning whether each one succeeded.
+        
+        Each job is (links, anime_title, episode_number, custom_path); its links are
+        tried in order until one of them downloads."""
+        return [bool(result) for result in self._run_parallel(self._download_job, jobs, max_workers)]
+    
+    def _download_job(self, job: tuple) -> bool:
+        """download_episodes worker: try one episode's links in order."""
+        links, anime_title, episode_number, custom_path = job
+        for link in links:
+            try:
+                if self.download_anime_episode([link], anime_title, episode_number, custom_path):
+                    return True
+            except Exception as e:
+                print(f"{bcolors.FAIL}Error during download attempt: {e}{bcolors.ENDC}")
+        return False
+    
+    def _run_parallel(self, func, items: List[Any], max_workers: int) -> List[Any]:
+        """Call func on every item from up to max_workers threads; results are in input order.
+        
+        Downloads are network-bound, so threads overlap them well. Progress bars are
+        only drawn when a single download runs at a time."""
+        if not items:
+            return []
+        results: List[Any] = [None] * len(items)
+        pending = iter(enumerate(items))
+        workers = max(1, min(max_workers, len(items)))
+        self.show_progress = workers == 1
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                for _ in range(workers):
+                    executor.submit(self._parallel_worker, func, pending, results)
+        finally:
+            self.show_progress = True
+        return results
+    
+    def _parallel_worker(self, func, pending, results: List[Any]):
+        """Take items off the shared iterator until none are left, then close this thread's browser."""
+        try:
+            while True:
+                with self._lock:
+                    job = next(pending, None)
+                if job is None:
+                    return
+                index, item = job
+                try:
+                    results[index] = func(item)
+                except Exception as e:
+                    print(f"{bcolors.FAIL}Download error: {e}{bcolors.ENDC}")
+        finally:
+            self.close_browser()
+    
+    def _process_one(self, index: int):
+        """Download a single queue item and record its outcome."""
+        link, anime_title, episode = self._q_link[index], self._q_title[index], self._q_episode[index]
+        with self._lock:
+            print(f"\nDownloading {anime_title} - Episode {episode} from {link['host']}")
+        
+        # Create anime directory if it doesn't exist
+        anime_dir = self.download_dir / anime_title.replace(':', ' -').replace('/', '-')
+        anime_dir.mkdir(exist_ok=True, parents=True)
+        
+        # Download file
+        filename = f"{anime_title}_Episode_{episode}.mp4"
+        destination = anime_dir / filename
+        
+        try:
+            success = self._download_file(link, destination)
+        except Exception as e:
+            print(f"Error downloading {destination}: {e}")
+            success = False
+        
+        with self._lock:
+            if success:
+                self._q_status[index] = self.COMPLETED
+                self._q_progress[index] = 100
+                print(f"Download completed: {destination}")
+            else:
+                self._q_status[index] = self.FAILED
+                print(f"Download failed: {link['url']}")
     
     def _download_file(self, link: Dict[str, str], destination: Path) -> bool:
         """Download a file from a link and save it to the destination."""
@@ -1629,6 +2434,11 @@ class DownloadManager:
         print(f"Processing download from {host}: {url}")
         
         try:
+            handler = self._host_handler(url)
+            if handler:
+                return getattr(self, handler)(url, destination)
+            
+            # Unknown domain (redirectors, mirrors): go by the site's server label
             if "google" in host or "drive" in host:
                 return self._download_from_google_drive(url, destination)
             elif "mediafire.com" in url.lower() or ("mediafire" in host and not "4shared" in host):
@@ -1651,35 +2461,230 @@ class DownloadManager:
             print(f"Error downloading from {host}: {e}")
             return False
     
-    def _download_with_progress(self, url: str, destination: Path, headers=None) -> bool:
-        """Download a file with progress reporting."""
+    @classmethod
+    def _host_handler(cls, url: str) -> Optional[str]:
+        """Name of the download method for the URL's domain (or a parent domain), or None."""
+        netloc = urllib.parse.urlsplit(url).hostname or ""
+        if netloc.startswith("www."):
+            netloc = netloc[4:]
+        handler = cls.HOST_HANDLERS.get(netloc)
+        if handler is None and netloc.count(".") > 1:
+            # Numbered mirrors such as s3.mp4upload.com
+            handler = cls.HOST_HANDLERS.get(netloc.split(".", 1)[1])
+        return handler
+    
+    # Bytes kept from the previous chunk so matches spanning two chunks are found
+    PAGE_SEARCH_OVERLAP = 4096
+    
+    def _search_page(self, url: str, pattern: "re.Pattern[bytes]", headers=None) -> Optional[str]:
+        """Stream a page and return the first group of the first match of a bytes pattern, or None.
+        
+        Stops reading as soon as the pattern is found."""
+        return self._page_link(url, lambda response: self._scan_stream(response, pattern), headers)
+    
+    def _scan_stream(self, response, pattern: "re.Pattern[bytes]") -> Optional[str]:
+        """First group of the first match of a bytes pattern in a streamed body, or None."""
+        tail = b""
+        for chunk in response.iter_content(chunk_size=1 << 16):
+            window = tail + chunk
+            match = pattern.search(window)
+            if match:
+                return match.group(1).decode("utf-8", "replace")
+            tail = window[-self.PAGE_SEARCH_OVERLAP:]
+        return None
+    
+    def _read_page_until(self, response, search) -> str:
+        """Text of a streamed page, read only until search(text, start) finds something.
+        
+        search is a compiled pattern's .search or any callable with the same signature."""
+        if response.encoding is None:
+            response.encoding = "utf-8"
+        text = ""
+        for chunk in response.iter_content(chunk_size=8192, decode_unicode=True):
+            start = max(len(text) - self.PAGE_SEARCH_OVERLAP, 0)
+            text += chunk
+            if search(text, start):
+                break
+        return text
+    
+    def _page_link(self, url: str, extract, headers=None) -> Optional[str]:
+        """The direct link on a file host page, as returned by extract(response).
+        
+        A page seen before is fetched conditionally (If-None-Match/If-Modified-Since);
+        if it is unchanged and its cached link still answers, no body is downloaded."""
+        cached = self.database.get_page_link(url) if self.database else None
+        if cached:
+            etag, last_modified, link = cached
+            conditional = dict(headers or {})
+            if etag:
+                conditional["If-None-Match"] = etag
+            if last_modified:
+                conditional["If-Modified-Since"] = last_modified
+            with self.session.get(url, headers=conditional, stream=True) as response:
+                if response.status_code != 304:
+                    return self._extract_page_link(url, response, extract)
+            if self._link_alive(link):
+                print(f"Page unchanged, reusing its direct link: {link}")
+                return link
+        
+        with self.session.get(url, headers=headers, stream=True) as response:
+            return self._extract_page_link(url, response, extract)
+    
+    def _extract_page_link(self, url: str, response, extract) -> Optional[str]:
+        """Run extract on a fresh page response and cache the result if the page can be revalidated."""
+        response.raise_for_status()
+        link = extract(response)
+        etag, last_modified = response.headers.get("ETag"), response.headers.get("Last-Modified")
+        if link and self.database and (etag or last_modified):
+            self.database.set_page_link(url, etag, last_modified, link)
+        return link
+    
+    def _link_alive(self, link: str) -> bool:
+        """Whether a cached direct link still answers (its tokens may have expired)."""
+        try:
+            return self.session.head(link, allow_redirects=True, timeout=10).status_code < 400
+        except Exception:
+            return False
+    
+    def _download_with_progress(self, url: str, destination: Path, headers=None, show_progress: Optional[bool] = None) -> bool:
+        """Download a file with progress reporting (unless disabled or not worth it)."""
+        if show_progress is None:
+            show_progress = self.show_progress
+        return self._stream_to_file(url, destination, headers, show_progress)
+    
+    def _stream_to_file(self, url: str, destination: Path, headers, show_progress: bool) -> bool:
+        """_download_with_progress body. Every connection it opens holds a slot of the host
+        that serves the body, which after a redirect (e.g. to a CDN) is not url's host."""
+        slots = []  # host slots held by this transfer, released on the way out
         try:
-            response = self.requests.get(url, stream=True, headers=headers)
+            slot = self._host_slot(url)
+            slot.acquire()
+            slots.append(slot)
+            response = self.session.get(url, stream=True, headers=headers)
+            
+            served = self._host_slot(response.url)
+            if served is not slot:
+                # Redirected: move the transfer's slot to the serving host, waiting (with
+                # the connection closed) if that host is busy
+                slots.pop().release()
+                slot = served
+                if not slot.acquire(blocking=False):
+                    response.close()
+                    slot.acquire()
+                    slots.append(slot)
+                    response = self.session.get(response.url, stream=True, headers=headers)
+                else:
+                    slots.append(slot)
             response.raise_for_status()
             
             # Get file size if available
             total_size = int(response.headers.get('content-length', 0))
             bytes_downloaded = 0
             
+            if self._accepts_segments(response, total_size):
+                # Extra range connections take further slots of the serving host, without
+                # waiting; if none is free the file comes down this one connection
+                while len(slots) < self.DOWNLOAD_SEGMENTS and slot.acquire(blocking=False):
+                    slots.append(slot)
+                if len(slots) > 1:
+                    response.close()
+                    try:
+                        return self._download_segmented(response.url, destination, headers, total_size,
+                                                        show_progress, len(slots))
+                    except Exception as e:
+                        print(f"\nSegmented download failed ({e}), retrying as a single stream")
+                    while len(slots) > 1:
+                        slots.pop().release()
+                    response = self.session.get(response.url, stream=True, headers=headers)
+                    response.raise_for_status()
+            
+            # No bar to draw: let shutil copy the body in large blocks
+            if not show_progress or total_size < self.PROGRESS_MIN_SIZE:
+                response.raw.decode_content = True
+                with open(destination, 'wb') as f:
+                    shutil.copyfileobj(response.raw, f, self.WRITE_BUFFER_SIZE)
+                return True
+            
             # Download with progress
-            with open(destination, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
+            last_report = 0.0
+            with open(destination, 'wb', buffering=self.WRITE_BUFFER_SIZE) as f:
+                for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
                     if chunk:
                         f.write(chunk)
                         bytes_downloaded += len(chunk)
                         
-                        # Print progress
-                        if total_size > 0:
-                            percent = int(bytes_downloaded * 100 / total_size)
-                            progress_bar = '#' * (percent // 5)
-                            spaces = ' ' * (20 - (percent // 5))
-                            print(f"\rProgress: [{progress_bar}{spaces}] {percent}% ({bytes_downloaded}/{total_size} bytes)", end='')
+                        # Print progress (throttled, but always show the final state)
+                        now = time.monotonic()
+                        if total_size > 0 and (now - last_report >= self.PROGRESS_INTERVAL or bytes_downloaded >= total_size):
+                            last_report = now
+                            self._print_progress(bytes_downloaded, total_size)
                 
             print()  # New line after progress bar
             return True
         except Exception as e:
             print(f"\nError during download: {e}")
             return False
+        finally:
+            for slot in slots:
+                slot.release()
+    
+    def _print_progress(self, done: int, total: int):
+        """Redraw the one-line progress bar."""
+        percent = min(done * 100 // total, 100)
+        with self._lock:
+            sys.stdout.write(f"\rProgress: [{self.PROGRESS_BARS[percent // 5]}] {percent}% ({done}/{total} bytes)")
+            sys.stdout.flush()
+    
+    def _accepts_segments(self, response, total_size: int) -> bool:
+        """Whether a file is big enough to split and its server serves plain byte ranges of it."""
+        return (total_size >= self.SEGMENT_MIN_SIZE
+                and response.headers.get('accept-ranges', '').lower() == 'bytes'
+                and 'content-encoding' not in response.headers)
+    
+    def _download_segmented(self, url: str, destination: Path, headers, total_size: int, show_progress: bool,
+                            segments: int) -> bool:
+        """Fetch url as that many byte ranges in parallel, each written at its own offset of destination."""
+        with open(destination, 'wb') as f:
+            f.truncate(total_size)
+        
+        step = -(-total_size // segments)
+        ranges = [(lo, min(lo + step, total_size) - 1) for lo in range(0, total_size, step)]
+        done = [0] * len(ranges)  # bytes written per segment, each owned by one thread
+        failed = Event()  # set by the first failing segment so the others stop early
+        
+        def fetch(index: int):
+            lo, hi = ranges[index]
+            range_headers = dict(headers or {}, Range=f"bytes={lo}-{hi}")
+            range_headers['Accept-Encoding'] = 'identity'
+            try:
+                with self.session.get(url, stream=True, headers=range_headers) as response:
+                    if response.status_code != 206:
+                        raise IOError(f"server ignored the byte range (HTTP {response.status_code})")
+                    with open(destination, 'r+b') as f:
+                        f.seek(lo)
+                        for chunk in response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE):
+                            if failed.is_set():
+                                return
+                            f.write(chunk)
+                            done[index] += len(chunk)
+                if done[index] != hi - lo + 1:
+                    raise IOError(f"segment {index + 1} ended after {done[index]} of {hi - lo + 1} bytes")
+            except Exception:
+                failed.set()
+                raise
+        
+        with ThreadPoolExecutor(max_workers=len(ranges)) as pool:
+            futures = [pool.submit(fetch, index) for index in range(len(ranges))]
+            while show_progress and not failed.is_set() and not all(future.done() for future in futures):
+                self._print_progress(sum(done), total_size)
+                time.sleep(self.PROGRESS_INTERVAL)
+            for future in futures:
+                future.result()
+        
+        if show_progress:
+            self._print_progress(sum(done), total_size)
+            print()  # New line after progress bar
+        return True
     
     def _download_from_google_drive(self, url: str, destination: Path) -> bool:
         """Download a file from Google Drive."""
@@ -1687,16 +2692,9 @@ class DownloadManager:
             print(f"Processing Google Drive URL: {url}")
             
             # Extract file ID from Google Drive URL
-            import re
             file_id = None
-            patterns = [
-                r'https?://drive\.google\.com/file/d/([^/]+)',
-                r'https?://drive\.google\.com/open\?id=([^&]+)',
-                r'https?://drive\.google\.com/uc\?id=([^&]+)'
-            ]
-            
-            for pattern in patterns:
-                match = re.search(pattern, url)
+            for pattern in _GDRIVE_ID_RES:
+                match = pattern.search(url)
                 if match:
                     file_id = match.group(1)
                     break
@@ -1710,17 +2708,21 @@ class DownloadManager:
             print(f"Direct download URL: {download_url}")
             
             # Start the initial request to get cookies and confirm token
-            session = self.requests.Session()
-            response = session.get(download_url, stream=True)
-            
-            # Check if we need to handle the confirmation page
-            for k, v in response.cookies.items():
-                if k.startswith('download_warning'):
-                    # We need to confirm the download
-                    token = v
+            session = self.session
+            with session.get(download_url, stream=True) as response:
+                # Older flow: the confirm token comes as a download_warning cookie
+                token = next((v for k, v in response.cookies.items() if k.startswith('download_warning')), None)
+                if token:
                     download_url = f"{download_url}&confirm={token}"
                     print(f"Download confirmation required. New URL: {download_url}")
-                    break
+                elif response.headers.get('content-type', '').startswith('text/html'):
+                    # Current flow: an HTML warning page whose form carries the token
+                    # (only read the body when it's a page, never the file itself)
+                    action = _GDRIVE_FORM_ACTION_RE.search(response.content)
+                    if action:
+                        params = {name.decode(): value.decode() for name, value in _GDRIVE_FORM_INPUT_RE.findall(response.content)}
+                        download_url = f"{action.group(1).decode()}?{urllib.parse.urlencode(params)}"
+                        print(f"Download confirmation required. New URL: {download_url}")
             
             # Download the file
             return self._download_with_progress(download_url, destination, headers=session.headers)
@@ -1732,12 +2734,6 @@ class DownloadManager:
     def _download_from_mediafire(self, url: str, destination: Path) -> bool:
         """Download a file from Mediafire using the dedicated mediafire.py module."""
         try:
-            # Import necessary modules upfront
-            import os
-            import re
-            import shutil
-            import traceback
-            
             print(f"{bcolors.HEADER}Processing Mediafire URL: {url}{bcolors.ENDC}")
             
             # First check if it's truly a MediaFire URL
@@ -1753,9 +2749,7 @@ class DownloadManager:
             file_key = None
             
             # Pattern 1: Standard MediaFire file URL
-            folder_or_file = re.findall(
-                r"mediafire\.com/(folder|file|file_premium)\/([a-zA-Z0-9]+)", url
-            )
+            folder_or_file = _MF_FILE_RE.findall(url)
             
             if folder_or_file:
                 # Get the file type and key
@@ -1763,7 +2757,7 @@ class DownloadManager:
                 print(f"{bcolors.OKGREEN}Found file key: {file_key}{bcolors.ENDC}")
             else:
                 # Pattern 2: Alternative MediaFire URL format
-                alt_pattern = re.findall(r"mediafire\.com/\?([a-zA-Z0-9]+)", url)
+                alt_pattern = _MF_ALT_RE.findall(url)
                 if alt_pattern:
                     file_key = alt_pattern[0]
                     print(f"{bcolors.OKGREEN}Found file key using alternative pattern: {file_key}{bcolors.ENDC}")
@@ -1771,11 +2765,9 @@ class DownloadManager:
                     # Pattern 3: Extract from download button URL
                     try:
                         print(f"{bcolors.WARNING}Trying to extract key from webpage...{bcolors.ENDC}")
-                        response = self.requests.get(url)
-                        download_link_match = re.search(r'href="(https://download[^"]+)"', response.text)
-                        if download_link_match:
+                        direct_url = self._search_page(url, _MF_DIRECT_RE)
+                        if direct_url:
                             # Found direct link, just use it instead of mediafire.py
-                            direct_url = download_link_match.group(1)
                             print(f"{bcolors.OKGREEN}Found direct download URL: {direct_url}{bcolors.ENDC}")
                             return self._download_with_progress(direct_url, destination)
                     except Exception as web_e:
@@ -1785,14 +2777,6 @@ class DownloadManager:
                 print(f"{bcolors.FAIL}Could not extract MediaFire file key from URL: {url}{bcolors.ENDC}")
                 return False
             
-            # Close the browser if it's open to free up resources before download
-            try:
-                if hasattr(self, 'site_interactor') and self.site_interactor:
-                    print(f"{bcolors.OKCYAN}Closing browser to improve download speed...{bcolors.ENDC}")
-                    self.site_interactor.close_browser()
-            except Exception as browser_e:
-                print(f"{bcolors.WARNING}Error closing browser: {browser_e}{bcolors.ENDC}")
-            
             # Import functions from mediafire.py
             try:
                 from mediafire import get_file
@@ -1812,7 +2796,8 @@ class DownloadManager:
                 os.makedirs(output_dir, exist_ok=True)
                 
                 # Call get_file with explicit parameters
-                downloaded_path = get_file(file_key, output_dir)
+                with self._host_slot(url):
+                    downloaded_path = get_file(file_key, output_dir)
                 
                 # Check the result
                 if not downloaded_path:
@@ -1822,7 +2807,6 @@ class DownloadManager:
                 
                 # Rename the file if necessary
                 if destination.name and downloaded_path != str(destination):
-                    import os
                     if os.path.exists(downloaded_path):
                         print(f"Renaming {downloaded_path} to {destination}")
                         shutil.move(downloaded_path, destination)
@@ -1834,7 +2818,6 @@ class DownloadManager:
                 return True
             except Exception as e:
                 print(f"{bcolors.FAIL}Error using mediafire.py to download: {e}{bcolors.ENDC}")
-                import traceback
                 traceback.print_exc()
                 
                 # Try direct download as fallback
@@ -1843,7 +2826,6 @@ class DownloadManager:
                 
         except Exception as e:
             print(f"{bcolors.FAIL}Error with MediaFire download: {e}{bcolors.ENDC}")
-            import traceback
             traceback.print_exc()
             return False
     
@@ -1897,50 +2879,70 @@ class DownloadManager:
             print(f"Error downloading from Dropbox: {e}")
             return False
     
+    def _browser(self):
+        """This thread's browser for hosts that need one, launched on first use and then kept warm."""
+        browser = getattr(self._local, "browser", None)
+        if browser is None or not browser.is_connected():
+            self.close_browser()
+            from playwright.sync_api import sync_playwright
+            self._local.playwright = sync_playwright().start()
+            browser = self._local.browser = self._local.playwright.chromium.launch(headless=False)  # Needs user interaction
+        return browser
+    
+    def close_browser(self):
+        """Close this thread's browser, if it started one."""
+        browser = getattr(self._local, "browser", None)
+        playwright = getattr(self._local, "playwright", None)
+        self._local.browser = self._local.playwright = None
+        try:
+            if browser:
+                browser.close()
+            if playwright:
+                playwright.stop()
+        except Exception as e:
+            print(f"{bcolors.WARNING}Error closing browser: {e}{bcolors.ENDC}")
+    
     def _download_from_mp4upload(self, url: str, destination: Path) -> bool:
         """Download a file from MP4Upload."""
         try:
             print(f"Processing MP4Upload URL: {url}")
             print("MP4Upload requires browser automation for download.")
             
-            # Import playwright here to keep it isolated
             try:
-                from playwright.sync_api import sync_playwright
+                browser = self._browser()
             except ImportError:
                 print("Playwright required for MP4Upload downloads.")
                 return False
             
-            with sync_playwright() as p:
-                browser = p.chromium.launch(headless=False)  # Needs user interaction
-                page = browser.new_page()
+            # A fresh context per download on the already running browser
+            context = browser.new_context()
+            try:
+                page = context.new_page()
                 
-                try:
-                    # Navigate to the page
-                    page.goto(url)
-                    
-                    # Wait for the player to load
-                    page.wait_for_selector("div#player")
-                    
-                    # Try to find the video source
-                    video_src = page.evaluate('''() => {
-                        const video = document.querySelector('video');
-                        return video ? video.src : null;
-                    }''')
-                    
-                    if video_src:
-                        print(f"Found video source: {video_src}")
-                        browser.close()
-                        return self._download_with_progress(video_src, destination)
-                    else:
-                        print("Could not find direct video source. Manual download required.")
-                        print("Please visit the URL and download manually.")
-                        browser.close()
-                        return False
-                    
-                except Exception as e:
-                    print(f"Error with MP4Upload browser automation: {e}")
-                    browser.close()
-                    return False
+                # Navigate to the page
+                page.goto(url, wait_until="domcontentloaded")
+                
+                # Wait for the player to load
+                page.wait_for_selector("div#player")
+                
+                # Try to find the video source
+                video_src = page.evaluate('''() => {
+                    const video = document.querySelector('video');
+                    return video ? video.src : null;
+                }''')
+            except Exception as e:
+                print(f"Error with MP4Upload browser automation: {e}")
+                return False
+            finally:
+                context.close()
+            
+            if video_src:
+                print(f"Found video source: {video_src}")
+                return self._download_with_progress(video_src, destination)
+            else:
+                print("Could not find direct video source. Manual download required.")
+                print("Please visit the URL and download manually.")
+                return False
             
         except Exception as e:
             print(f"Error downloading from MP4Upload: {e}")
@@ -1951,20 +2953,18 @@ class DownloadManager:
         try:
             print(f"Processing Solidfiles URL: {url}")
             
-            # Get the page content
-            response = self.requests.get(url)
-            response.raise_for_status()
-            
-            # Extract the direct download link
-            import re
-            pattern = r'downloadUrl":"([^"]+)"'
-            match = re.search(pattern, response.text)
+            # Get the page content and extract the direct download link
+            def extract(response):
+                # The key is a literal, so plain str.find does instead of a regex
+                find = lambda text, start=0: _quoted_after(text, _SOLIDFILES_URL_KEY, start)
+                link = find(self._read_page_until(response, find))
+                return link.replace('\\', '') if link else None
             
-            if not match:
+            direct_url = self._page_link(url, extract)
+            if not direct_url:
                 print("Could not find direct download link")
                 return False
             
-            direct_url = match.group(1).replace('\\', '')
             print(f"Direct download URL: {direct_url}")
             
             # Download the file
@@ -1982,18 +2982,13 @@ class DownloadManager:
             # Special case for MediaFire URLs - try to extract the direct download link
             if "mediafire.com" in url.lower():
                 try:
-                    import re
                     print(f"{bcolors.OKCYAN}Detected MediaFire URL, trying to extract direct download link...{bcolors.ENDC}")
                     headers = {
-                        "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36",
                         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8"
                     }
-                    response = self.requests.get(url, headers=headers)
-                    
                     # Look for download link in page content
-                    download_link_match = re.search(r'href="(https://download[^"]+)"', response.text)
-                    if download_link_match:
-                        direct_url = download_link_match.group(1)
+                    direct_url = self._search_page(url, _MF_DIRECT_RE, headers=headers)
+                    if direct_url:
                         print(f"{bcolors.OKGREEN}Found direct MediaFire download URL: {direct_url}{bcolors.ENDC}")
                         return self._download_with_progress(direct_url, destination, headers=headers)
                     else:
@@ -2020,18 +3015,18 @@ class DownloadManager:
             
             # Get the page content
             headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/97.0.4692.71 Safari/537.36",
                 "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
-                "Accept-Language": "en-US,en;q=0.5",
                 "Referer": "https://www.4shared.com/",
-                "Connection": "keep-alive"
             }
             
             # First request to get cookies
-            session = self.requests.Session()
+            session = self.session
             try:
-                response = session.get(url, headers=headers)
-                response.raise_for_status()
+                # Stop reading (and free the connection) once a direct link shows up;
+                # the free-download and script fallbacks need the rest of the page
+                with session.get(url, headers=headers, stream=True) as response:
+                    response.raise_for_status()
+                    page = self._read_page_until(response, _4SHARED_DOWNLOAD_RE.search)
             except Exception as e:
                 print(f"{bcolors.FAIL}Error accessing 4shared page: {e}{bcolors.ENDC}")
                 return False
@@ -2040,48 +3035,26 @@ class DownloadManager:
             # 4shared has multiple ways to get the download link
             
             # Method 1: Try to find the download button directly
-            direct_link = None
-            download_patterns = [
-                r'id="baseDownloadButton".*?href="([^"]+)"',
-                r'id="directDownloadLink".*?href="([^"]+)"',
-                r'<a.*?class="dbtn.*?href="([^"]+)"',
-                r'href="(https?://[^"]+?/get/[^"]+?)"',
-                r'<a.*?class="linkShowD".*?href="([^"]+)"'
-            ]
-            
-            for pattern in download_patterns:
-                match = re.search(pattern, response.text, re.DOTALL)
-                if match:
-                    direct_link = match.group(1)
-                    print(f"Found direct download link: {direct_link}")
-                    break
+            direct_link = _first_group(_4SHARED_DOWNLOAD_RE, page)
+            if direct_link:
+                print(f"Found direct download link: {direct_link}")
             
             # Method 2: If we couldn't find a direct link, check for the free download option
             if not direct_link:
                 # Check if we need to switch to the free download page
-                free_download_link = None
-                free_download_patterns = [
-                    r'href="([^"]+download/free/[^"]+)"',
-                    r'<a.*?class="freeDownloadButton".*?href="([^"]+)"',
-                    r'id="freeDownloadButton".*?href="([^"]+)"'
-                ]
-                
-                for pattern in free_download_patterns:
-                    match = re.search(pattern, response.text, re.DOTALL)
-                    if match:
-                        free_download_link = match.group(1)
-                        print(f"Found free download link: {free_download_link}")
-                        break
+                free_download_link = _first_group(_4SHARED_FREE_RE, page)
                 
                 if free_download_link:
+                    print(f"Found free download link: {free_download_link}")
                     # Navigate to the free download page
                     try:
                         print("Navigating to free download page...")
                         response = session.get(free_download_link, headers=headers)
                         response.raise_for_status()
+                        page = response.text
                         
                         # Check for a countdown
-                        countdown_match = re.search(r'var c = (\d+);', response.text)
+                        countdown_match = _4SHARED_COUNTDOWN_RE.search(page)
                         if countdown_match:
                             countdown = int(countdown_match.group(1))
                             print(f"4shared countdown: {countdown} seconds")
@@ -2089,29 +3062,18 @@ class DownloadManager:
                             time.sleep(countdown + 1)
                         
                         # Now try to find the download link
-                        for pattern in download_patterns:
-                            match = re.search(pattern, response.text, re.DOTALL)
-                            if match:
-                                direct_link = match.group(1)
-                                print(f"Found direct download link after countdown: {direct_link}")
-                                break
+                        direct_link = _first_group(_4SHARED_DOWNLOAD_RE, page)
+                        if direct_link:
+                            print(f"Found direct download link after countdown: {direct_link}")
                     except Exception as e:
                         print(f"{bcolors.FAIL}Error during free download process: {e}{bcolors.ENDC}")
             
             # If we still can't find a direct link, try extracting from JavaScript
             if not direct_link:
                 print("Trying to extract download link from JavaScript...")
-                js_patterns = [
-                    r'var dlLink = "([^"]+)";',
-                    r'var url = "([^"]+)";'
-                ]
-                
-                for pattern in js_patterns:
-                    match = re.search(pattern, response.text)
-                    if match:
-                        direct_link = match.group(1)
-                        print(f"Found direct download link in JavaScript: {direct_link}")
-                        break
+                direct_link = _first_group(_4SHARED_JS_RE, page)
+                if direct_link:
+                    print(f"Found direct download link in JavaScript: {direct_link}")
             
             if not direct_link:
                 print(f"{bcolors.FAIL}Could not find download link on 4shared page{bcolors.ENDC}")
@@ -2127,64 +3089,76 @@ class DownloadManager:
             print(f"Proceeding with download from: {direct_link}")
             
             # Download the file
-            try:
-                response = session.get(direct_link, stream=True, headers=headers)
-                response.raise_for_status()
-                
-                # Get the filename from Content-Disposition header if available
-                content_disposition = response.headers.get('Content-Disposition')
-                if content_disposition:
-                    filename_match = re.search(r'filename="([^"]+)"', content_disposition)
-                    if filename_match:
-                        filename = filename_match.group(1)
-                        # If destination is a directory, append the filename
-                        if destination.is_dir():
-                            destination = destination / filename
-                
-                # Download with progress bar
-                total_size = int(response.headers.get('content-length', 0))
-                bytes_downloaded = 0
-                
-                # Create a progress bar
-                print(f"{bcolors.OKGREEN}Downloading {destination.name}...{bcolors.ENDC}")
-                progress_length = 50
-                
-                with open(destination, 'wb') as f:
-                    start_time = time.time()
-                    for chunk in response.iter_content(chunk_size=8192):
-                        if chunk:
-                            f.write(chunk)
-                            bytes_downloaded += len(chunk)
-                            
-                            # Update progress bar
-                            if total_size > 0:
-                                percent = 100 * bytes_downloaded / total_size
-                                bar = '█' * int(percent / 2)
-                                spaces = ' ' * (progress_length - len(bar))
-                                
-                                # Calculate speed
-                                elapsed_time = time.time() - start_time
-                                if elapsed_time > 0:
-                                    speed = bytes_downloaded / elapsed_time
-                                    speed_str = f"{self._format_size(speed)}/s"
-                                else:
-                                    speed_str = "? KB/s"
-                                
-                                sys.stdout.write(f"\r{bcolors.OKBLUE}Progress: |{bar}{spaces}| {percent:.1f}% | {speed_str}{bcolors.ENDC}")
-                                sys.stdout.flush()
-                
-                print(f"\n{bcolors.OKGREEN}Download complete: {destination}{bcolors.ENDC}")
-                return True
-            except Exception as e:
-                print(f"{bcolors.FAIL}Error downloading file: {e}{bcolors.ENDC}")
-                return False
+            with self._host_slot(direct_link):
+                try:
+                    response = session.get(direct_link, stream=True, headers=headers)
+                    response.raise_for_status()
+                    
+                    # Get the filename from Content-Disposition header if available
+                    content_disposition = response.headers.get('Content-Disposition')
+                    if content_disposition:
+                        filename_match = _FILENAME_RE.search(content_disposition)
+                        if filename_match:
+                            filename = filename_match.group(1)
+                            # If destination is a directory, append the filename
+                            if destination.is_dir():
+                                destination = destination / filename
+                    
+                    # Download with progress bar
+                    total_size = int(response.headers.get('content-length', 0))
+                    print(f"{bcolors.OKGREEN}Downloading {destination.name}...{bcolors.ENDC}")
+                    
+                    # shutil copies the decoded body in 1 MiB blocks; tqdm counts the
+                    # bytes as they are read, rate-limiting its own redraws
+                    response.raw.decode_content = True
+                    with open(destination, 'wb') as f:
+                        if not self.show_progress:
+                            shutil.copyfileobj(response.raw, f, self.WRITE_BUFFER_SIZE)
+                        elif tqdm is not None:
+                            with tqdm(total=total_size or None, unit='B', unit_scale=True, desc=destination.name, colour='green') as bar:
+                                shutil.copyfileobj(CallbackIOWrapper(bar.update, response.raw, 'read'), f, self.WRITE_BUFFER_SIZE)
+                        else:
+                            chunks = response.iter_content(chunk_size=self.DOWNLOAD_CHUNK_SIZE)
+                            self._write_with_speed_bar(f, chunks, total_size)
+                    
+                    print(f"\n{bcolors.OKGREEN}Download complete: {destination}{bcolors.ENDC}")
+                    return True
+                except Exception as e:
+                    print(f"{bcolors.FAIL}Error downloading file: {e}{bcolors.ENDC}")
+                    return False
                 
         except Exception as e:
             print(f"{bcolors.FAIL}Error with 4shared download: {e}{bcolors.ENDC}")
-            import traceback
             traceback.print_exc()
             return False
     
+    def _write_with_speed_bar(self, f, chunks, total_size: int):
+        """Write chunks to f, drawing a bar with the transfer speed (used when tqdm isn't installed)."""
+        bytes_downloaded = 0
+        start_time = last_report = time.monotonic()
+        for chunk in chunks:
+            f.write(chunk)
+            bytes_downloaded += len(chunk)
+            
+            # Update progress bar (throttled, but always show the final state)
+            now = time.monotonic()
+            if total_size > 0 and (now - last_report >= self.PROGRESS_INTERVAL or bytes_downloaded >= total_size):
+                last_report = now
+                percent = 100 * bytes_downloaded / total_size
+                bar = self.BLOCK_PROGRESS_BARS[min(int(percent / 2), 50)]
+                speed_str = f"{self._format_size(bytes_downloaded / (now - start_time))}/s" if now > start_time else "? KB/s"
+                sys.stdout.write(f"\r{bcolors.OKBLUE}Progress: |{bar}| {percent:.1f}% | {speed_str}{bcolors.ENDC}")
+                sys.stdout.flush()
+    
+    @staticmethod
+    def _format_size(size: float) -> str:
+        """Human-readable byte count, e.g. 1.5 MB."""
+        for unit in ("B", "KB", "MB", "GB"):
+            if size < 1024:
+                return f"{size:.1f} {unit}"
+            size /= 1024
+        return f"{size:.1f} TB"
+    
     def download_anime_episode(self, download_links: List[Dict[str, str]], anime_title: str, episode_number: str, custom_path: str = None) -> bool:
         """
         Download an anime episode prioritizing Mediafire, then Google Drive links.
@@ -2204,10 +3178,17 @@ class DownloadManager:
         
         # Prioritize links: Mediafire first, then Google Drive, then others
         # More strict filtering for mediafire links - check both host and URL, and verify it's actually mediafire.com
-        mediafire_links = [link for link in download_links if 
-                          ("mediafire" in link["host"].lower() and "mediafire.com" in link["url"].lower()) or 
-                          (link["url"].lower().startswith("https://www.mediafire.com/") or 
-                           link["url"].lower().startswith("https://mediafire.com/"))]
+        # Single pass over the links
+        mediafire_links, google_links, other_links = [], [], []
+        for link in download_links:
+            url = link["url"]
+            host = link["host"]
+            if (_MF_HOST_RE.search(host) and _MF_URL_RE.search(url)) or _MF_PREFIX_RE.match(url):
+                mediafire_links.append(link)
+            elif _GDRIVE_HOST_RE.search(host) and _GDRIVE_URL_RE.search(url):
+                google_links.append(link)
+            else:
+                other_links.append(link)
         
         # Debug output
         print(f"\nFound {len(mediafire_links)} genuine MediaFire links for {anime_title} episode {episode_number}")
@@ -2215,14 +3196,6 @@ class DownloadManager:
             for i, link in enumerate(mediafire_links):
                 print(f"MediaFire link {i+1}: {link['url'][:70]}..." if len(link['url']) > 70 else link['url'])
         
-        google_links = [link for link in download_links if 
-                        ("google" in link["host"].lower() or "drive" in link["host"].lower()) and
-                        ("drive.google.com" in link["url"].lower() or "drive.usercontent.google.com" in link["url"].lower())]
-        
-        other_links = [link for link in download_links if 
-                      link not in mediafire_links and 
-                      link not in google_links]
-        
         prioritized_links = mediafire_links + google_links + other_links
         
         if not prioritized_links:
@@ -2268,7 +3241,7 @@ class DownloadManager:
             print(f"URL: {link['url'][:70]}..." if len(link['url']) > 70 else link['url'])
             
             # For Mediafire links, show special handling message
-            if "mediafire.com" in link["url"].lower():
+            if _MF_URL_RE.search(link["url"]):
                 print(f"{bcolors.OKGREEN}Using optimized Mediafire downloader{bcolors.ENDC}")
             
             if self._download_file(link, destination):
@@ -2288,7 +3261,7 @@ class CLI:
         self.database = AnimeDatabase()
         self.site_interactor = SiteInteractor(self.database)
         self.pattern_recognition = PatternRecognition(self.database)
-        self.download_manager = DownloadManager()
+        self.download_manager = DownloadManager(database=self.database)
         # Default site for anime downloads
         self.default_site = "@https://witanime.cyou"
         # ASCII logo path
@@ -2309,16 +3282,20 @@ class CLI:
         
         args = parser.parse_args()
         
-        if args.search:
-            self.search_anime(args.search, args.site, not args.headless)
-        elif args.download and args.episode:
-            self.download_specific_anime(args.download, args.episode, args.site)
-        elif args.download:
-            self.download_anime(args.download)
-        elif args.list:
-            self.list_saved_anime()
-        else:
-            self.interactive_mode()
+        # The browser is kept open between searches and closed once on the way out
+        try:
+            if args.search:
+                self.search_anime(args.search, args.site, not args.headless)
+            elif args.download and args.episode:
+                self.download_specific_anime(args.download, args.episode, args.site)
+            elif args.download:
+                self.download_anime(args.download)
+            elif args.list:
+                self.list_saved_anime()
+            else:
+                self.interactive_mode()
+        finally:
+            self.site_interactor.close_browser()
     
     def _display_logo(self):
         """Display the ASCII art logo."""
@@ -2327,73 +3304,44 @@ class CLI:
                 with open(self.logo_path, 'r', encoding='utf-8') as f:
                     logo_lines = f.readlines()
                 
-                # Get terminal width for centering
-                try:
-                    terminal_width = os.get_terminal_size().columns
-                except:
-                    terminal_width = 80  # Default if can't get terminal size
+                terminal_width = _TERMINAL_WIDTH
                 
                 # Pick a random color for the logo with enhanced colors
                 colors = ['red', 'green', 'yellow', 'blue', 'magenta', 'cyan']
-                logo_color = random.choice(colors)
-                
-                print("\n")  # Add some space before the logo
+                prefix = _COLOR_CODES[random.choice(colors)]
                 
                 # Display logo with proper centering
-                max_line_length = max(len(line.rstrip()) for line in logo_lines)
-                for line in logo_lines:
-                    line_content = line.rstrip()
-                    padding = (terminal_width - max_line_length) // 2
-                    if padding < 0:
-                        padding = 0
-                    print(" " * padding + self._colorize(line_content, logo_color))
+                logo_lines = [line.rstrip() for line in logo_lines]
+                max_line_length = max(map(len, logo_lines), default=0)
+                padding = " " * max(0, (terminal_width - max_line_length) // 2)
+                out = ["\n"]  # Add some space before the logo
+                out.extend(padding + prefix + line + _RESET for line in logo_lines)
                 
                 # Calculate center for title text
                 title = "✨ Anime Downloader ✨"
-                title_padding = (terminal_width - len(title)) // 2
-                if title_padding < 0:
-                    title_padding = 0
-                
-                print("\n" + " " * title_padding + self._colorize(title, "bold"))
+                title_padding = max(0, (terminal_width - len(title)) // 2)
+                out.append("\n" + " " * title_padding + self._colorize(title, "bold"))
                 
                 # Center the separator line
                 separator = "=" * min(70, terminal_width - 10)
-                sep_padding = (terminal_width - len(separator)) // 2
-                if sep_padding < 0:
-                    sep_padding = 0
-                
-                print(" " * sep_padding + self._colorize(separator, "yellow"))
+                sep_line = " " * max(0, (terminal_width - len(separator)) // 2) + self._colorize(separator, "yellow")
+                out.append(sep_line)
                 
                 # Center the version info
-                version_info = f"Version: 1.0.0 | Default Site: {self._colorize(self.default_site, 'green')}"
-                version_padding = (terminal_width - len(version_info) + len(self._colorize('', 'green'))) // 2
-                if version_padding < 0:
-                    version_padding = 0
-                print(" " * version_padding + version_info)
+                version_info = f"Version: 1.0.0 | Default Site: {self.default_site}"
+                version_padding = max(0, (terminal_width - len(version_info)) // 2)
+                out.append(" " * version_padding + f"Version: 1.0.0 | Default Site: {self._colorize(self.default_site, 'green')}")
+                out.append(sep_line + "\n")
                 
-                print(" " * sep_padding + self._colorize(separator, "yellow") + "\n")
+                # One write instead of a print (and flush) per line
+                sys.stdout.write("\n".join(out) + "\n")
         except Exception as e:
             print(f"Error displaying logo: {e}")
-            import traceback
             traceback.print_exc()
     
     def _colorize(self, text, color):
         """Colorize text for terminal output."""
-        colors = {
-            'reset': '\033[0m',
-            'black': '\033[30m',
-            'red': '\033[31m',
-            'green': '\033[32m',
-            'yellow': '\033[33m',
-            'blue': '\033[34m',
-            'magenta': '\033[35m',
-            'cyan': '\033[36m',
-            'white': '\033[37m',
-            'bold': '\033[1m',
-            'underline': '\033[4m'
-        }
-        
-        return f"{colors.get(color, '')}{text}{colors['reset']}"
+        return _ansi(text, color)
     
     def search_anime(self, query: str, site: Optional[str] = None, show_browser: bool = False):
         """Search for an anime."""
@@ -2437,10 +3385,6 @@ class CLI:
             
             try:
                 self.site_interactor.start_browser(headless=not show_browser)
-                
-                # Give the site a moment to load fully
-                time.sleep(2)
-                
                 results = self.site_interactor.search_anime(site, query)
             except Exception as e:
                 print(f"{self._colorize(f'Error during search: {e}', 'red')}")
@@ -2457,12 +3401,20 @@ class CLI:
             print(f"{self._colorize('#', 'yellow'):<4}{self._colorize('Title', 'yellow'):<50}{self._colorize('Match', 'yellow'):<6}")
             print(self._colorize("-" * 60, "blue"))
             
-            # Sort results by how closely they match the query (exact match first)
-            results.sort(key=lambda x: self._calculate_match_score(x['title'], query), reverse=True)
+            # Sort results by how closely they match the query (exact match first),
+            # scoring each title once for both the sort and the display
+            if fuzz is not None:
+                # rapidfuzz scores and ranks the whole batch natively
+                matches = fuzz_process.extract(query, [r['title'] for r in results], scorer=fuzz.WRatio,
+                                               processor=default_process, limit=None)
+                scored = [(score / 100.0, results[index]) for _, score, index in matches]
+            else:
+                scored = [(self._calculate_match_score(r['title'], query), r) for r in results]
+                scored.sort(key=lambda t: t[0], reverse=True)
+            results = [r for _, r in scored]
             
-            for i, result in enumerate(results, 1):
+            for i, (match_score, result) in enumerate(scored, 1):
                 # Calculate match percentage
-                match_score = self._calculate_match_score(result['title'], query)
                 match_display = f"{int(match_score * 100)}%"
                 
                 # Color code match percentages
@@ -2519,11 +3471,9 @@ class CLI:
                 }
                 print(f"\n{self._colorize('Storing anime in cache:', 'green')} {self._colorize(selected_anime['title'], 'cyan')}")
                 print(f"Episodes count: {len(episodes)}")
+                # Committed by the database's background flush (and at exit)
                 self.database.add_anime(selected_anime['title'], anime_metadata)
                 
-                # Explicitly save database to ensure data is written
-                self.database.save()
-                
                 # Display episodes in groups
                 self._display_episodes(episodes)
                 
@@ -2547,18 +3497,15 @@ class CLI:
             
         except Exception as e:
             print(f"\n{self._colorize(f'Error during search: {e}', 'red')}")
-            import traceback
             traceback.print_exc()
-        finally:
-            try:
-                self.site_interactor.close_browser()
-            except Exception as e:
-                print(f"Warning: Error closing browser: {e}")
     
-    def _calculate_match_score(self, title: str, query: str) -> float:
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def _calculate_match_score(title: str, query: str) -> float:
         """
         Calculate how closely a title matches the search query.
         Returns a score between 0 and 1, with 1 being an exact match.
+        Used when rapidfuzz is not installed; the search ranks with rapidfuzz otherwise.
         """
         title_lower = title.lower()
         query_lower = query.lower()
@@ -2571,94 +3518,82 @@ class CLI:
         if query_lower in title_lower:
             return 0.9
             
-        # Check if all words in query appear in title
+        # Scan the title once per query word; the count decides both cases below
         query_words = query_lower.split()
-        title_words = title_lower.split()
+        if not query_words:
+            # Whitespace-only query: nothing to compare word by word
+            return 0.2
+        matching_words = sum(1 for word in query_words if word in title_lower)
         
         # If all query words are in the title (in any order)
-        if all(word in title_lower for word in query_words):
+        if matching_words == len(query_words):
             return 0.8
             
         # Calculate word match percentage
-        matching_words = sum(1 for word in query_words if word in title_lower)
-        if query_words:
-            return 0.5 + (0.3 * matching_words / len(query_words))
-            
-        return 0.2  # Low relevance fallback
+        return 0.5 + (0.3 * matching_words / len(query_words))
+    
+    # Shown under every episode table
+    EPISODE_SELECTION_HELP = "\n".join([
+        "Enter episode numbers to download. Examples:",
+        f"{_ansi('  * Single episode:', 'yellow')} 5",
+        f"{_ansi('  * Multiple episodes:', 'yellow')} 1,3,5",
+        f"{_ansi('  * Range of episodes:', 'yellow')} 1-10",
+        f"{_ansi('  * Combination:', 'yellow')} 1,3,5-10,15",
+        f"{_ansi('  * All episodes:', 'yellow')} all",
+    ])
     
     def _display_episodes(self, episodes: List[Dict[str, Any]]):
         """Display episodes in a readable format."""
-        # Sort episodes by number if possible
-        try:
-            sorted_episodes = sorted(episodes, key=lambda x: int(x['number']) if x['number'].isdigit() else float('inf'))
-        except:
-            sorted_episodes = episodes
+        # Sort episodes by number if possible (sorted() computes each key once)
+        sorted_episodes = sorted(episodes, key=_episode_sort_key)
         
         # Count total episodes
         total_episodes = len(sorted_episodes)
-        print(f"\nFound {total_episodes} episodes")
         
-        # Display in a nice table format
-        print("\nAvailable Episodes:")
-        print("=" * 80)
+        # Display in a nice table format, built whole and written at once
+        lines = [f"\nFound {total_episodes} episodes", "\nAvailable Episodes:", "=" * 80]
         
-        # Group episodes in batches of 10 for display
+        # Group episodes in batches of 10 for display, with color and padding
         batch_size = 10
-        num_batches = (total_episodes + batch_size - 1) // batch_size
-        
-        for batch in range(num_batches):
-            start_idx = batch * batch_size
-            end_idx = min(start_idx + batch_size, total_episodes)
-            batch_episodes = sorted_episodes[start_idx:end_idx]
-            
-            # Format the episode numbers with color and padding
-            line = ""
-            for ep in batch_episodes:
-                ep_num = ep['number'].rjust(4)
-                line += f"{self._colorize(ep_num, 'cyan')} | "
-            
-            print(line)
-        
-        print("=" * 80)
-        print("Enter episode numbers to download. Examples:")
-        print(f"{self._colorize('  * Single episode:', 'yellow')} 5")
-        print(f"{self._colorize('  * Multiple episodes:', 'yellow')} 1,3,5")
-        print(f"{self._colorize('  * Range of episodes:', 'yellow')} 1-10")
-        print(f"{self._colorize('  * Combination:', 'yellow')} 1,3,5-10,15")
-        print(f"{self._colorize('  * All episodes:', 'yellow')} all")
+        lines.extend(
+            " | ".join(self._colorize(ep['number'].rjust(4), 'cyan') for ep in sorted_episodes[start:start + batch_size])
+            for start in range(0, total_episodes, batch_size)
+        )
+        
+        lines.append("=" * 80)
+        lines.append(self.EPISODE_SELECTION_HELP)
+        sys.stdout.write("\n".join(lines) + "\n")
     
     def _parse_episode_selection(self, selection: str, episodes: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
         """Parse user input for episode selection."""
         selected = []
         
-        # Create a dictionary for quick lookup by episode number
-        ep_dict = {ep['number']: ep for ep in episodes if ep['number'].isdigit()}
+        # Create a dictionary for quick lookup by episode number; ranges walk the
+        # (sorted) numbers that exist instead of every number in the range
+        ep_dict = {int(ep['number']): ep for ep in episodes if ep['number'].isdecimal()}
+        numbers = sorted(ep_dict)
         
-        # Process each part of the selection (comma-separated)
-        parts = selection.split(',')
-        for part in parts:
-            part = part.strip()
+        # Process each part of the selection (comma-separated); one match per part
+        # tells a range from a single number and captures the numbers
+        for part in selection.split(','):
+            match = _SELECTION_PART_RE.match(part)
+            if not match:
+                part = part.strip()
+                print(f"Invalid range format: {part}" if '-' in part else f"Invalid episode format: {part}")
+                continue
             
-            # Check if it's a range (e.g., "1-5")
-            if '-' in part:
-                try:
-                    start, end = map(int, part.split('-'))
-                    for num in range(start, end + 1):
-                        if str(num) in ep_dict:
-                            selected.append(ep_dict[str(num)])
-                except ValueError:
-                    print(f"Invalid range format: {part}")
-                    continue
+            start, end, single = match.groups()
             
-            # Check if it's a single episode number
-            elif part.isdigit():
-                if part in ep_dict:
-                    selected.append(ep_dict[part])
-                else:
-                    print(f"Episode {part} not found.")
+            # A range (e.g., "1-5")
+            if single is None:
+                start, end = int(start), int(end)
+                selected.extend(ep_dict[num] for num in numbers if start <= num <= end)
             
+            # A single episode number
+            elif int(single) in ep_dict:
+                selected.append(ep_dict[int(single)])
             else:
-                print(f"Invalid episode format: {part}")
+                print(f"Episode {single} not found.")
         
         return selected
     
@@ -2666,20 +3601,22 @@ class CLI:
         """Download the selected episodes."""
         print(f"\nPreparing to download {len(episodes)} episode(s) of {anime_title}")
         
-        # Make sure we have a browser for initial extraction
-        browser_started = False
-        if not hasattr(self.site_interactor, 'browser') or not self.site_interactor.browser:
-            self.site_interactor.start_browser()
-            browser_started = True
+        # Extract the download links of every selected episode up front, several
+        # pages at a time, so the browser is done before the first download starts
+        print("Extracting download links...")
+        all_download_links = self.site_interactor.extract_download_links_batch([ep['link'] for ep in episodes])
         
-        for i, episode in enumerate(episodes, 1):
+        # Close the browser before starting downloads to save resources
+        if self.site_interactor.browser:
+            print(f"{bcolors.OKCYAN}Closing browser to improve download speed...{bcolors.ENDC}")
+            self.site_interactor.close_browser()
+        
+        # Pick the sources for every episode first, then download them all together
+        jobs = []
+        for i, (episode, download_links) in enumerate(zip(episodes, all_download_links), 1):
             print(f"\n[{i}/{len(episodes)}] Processing episode {episode['number']}...")
             
-            # Extract download links
-            try:
-                download_links = self.site_interactor.extract_download_links(episode['link'])
-            except Exception as e:
-                print(f"Error extracting download links: {e}")
+            if download_links is None:
                 print(f"Skipping episode {episode['number']}")
                 continue
             
@@ -2688,31 +3625,23 @@ class CLI:
                 continue
             
             # Categorize all available links for better decision making
-            mediafire_links = []
-            google_drive_links = []
-            fourshared_links = []
-            mega_links = []
-            other_links = []
+            sources = {"mediafire": [], "gdrive": [], "fourshared": [], "mega": [], "other": []}
             
-            # Categorize links by source
+            # Categorize links by source with one scan of each URL
             for link in download_links:
-                url = link["url"].lower()
-                host = link["host"].lower()
-                
-                # Debug output for link classification
-                print(f"Classifying link: URL={url[:50]}... Host={host}")
-                
-                if "mediafire.com" in url and not "4shared" in url:
-                    print(f"Identified as MediaFire link")
-                    mediafire_links.append(link)
-                elif any(x in url for x in ["drive.google.com", "docs.google.com"]):
-                    google_drive_links.append(link)
-                elif "4shared.com" in url:
-                    fourshared_links.append(link)
-                elif "mega.nz" in url:
-                    mega_links.append(link)
-                else:
-                    other_links.append(link)
+                log.debug(f"Classifying link: URL={link['url'][:50]}... Host={link['host']}")
+                
+                match = _SOURCE_RE.search(link["url"])
+                source = match.lastgroup if match else "other"
+                if source == "mediafire":
+                    log.debug("Identified as MediaFire link")
+                sources[source].append(link)
+            
+            mediafire_links = sources["mediafire"]
+            google_drive_links = sources["gdrive"]
+            fourshared_links = sources["fourshared"]
+            mega_links = sources["mega"]
+            other_links = sources["other"]
             
             # Print summary of available links
             print(f"\n{bcolors.HEADER}Available download sources for episode {episode['number']}:{bcolors.ENDC}")
@@ -2754,57 +3683,37 @@ class CLI:
             
             # Ask for custom path
             custom_path = input(f"{bcolors.OKCYAN}Enter custom download path or press Enter for default: {bcolors.ENDC}")
-            path_to_use = custom_path if custom_path.strip() else None
-            
-            # Close the browser before starting downloads to save resources
-            if self.site_interactor.browser:
-                print(f"{bcolors.OKCYAN}Closing browser to improve download speed...{bcolors.ENDC}")
-                self.site_interactor.close_browser()
-            
-            # Try each link in the prioritized order
-            success = False
-            for link in prioritized_links:
-                # Try to download using the download manager
-                try:
-                    if self.download_manager.download_anime_episode([link], anime_title, episode['number'], path_to_use):
-                        success = True
-                        break
-                except Exception as e:
-                    print(f"{bcolors.FAIL}Error during download attempt: {e}{bcolors.ENDC}")
-                    continue
+            # Resolved now: the parallel downloads must not prompt for a location
+            path_to_use = custom_path.strip() or str(DOWNLOAD_DIR)
             
+            # Each link is tried in the prioritized order once the downloads start
+            jobs.append((prioritized_links, anime_title, episode['number'], path_to_use))
+        
+        if not jobs:
+            return
+        
+        # Download the episodes in parallel
+        print(f"\n{bcolors.HEADER}Downloading {len(jobs)} episode(s)...{bcolors.ENDC}")
+        for (_, _, number, _), success in zip(jobs, self.download_manager.download_episodes(jobs)):
             if not success:
-                print(f"{bcolors.FAIL}All download attempts failed for {anime_title} episode {episode['number']}.{bcolors.ENDC}")
+                print(f"{bcolors.FAIL}All download attempts failed for {anime_title} episode {number}.{bcolors.ENDC}")
                 print(f"{bcolors.WARNING}You may want to try again with a different source or check your internet connection.{bcolors.ENDC}")
-            
-            # Restart browser for next episode if needed
-            if i < len(episodes) and not self.site_interactor.browser:
-                self.site_interactor.start_browser()
-                browser_started = True
     
     def _prioritize_servers(self, links: List[Dict[str, str]]) -> List[Dict[str, str]]:
         """Sort download links by server priority."""
         # Updated prioritization: Mediafire first, then Google Drive, then others
+        # (mediafire 0, google/drive 1, mega 2, solidfiles 3, mp4upload 4, dropbox 5, others 6)
         def get_priority(link):
-            host_lower = link['host'].lower()
-            if "mediafire" in host_lower:
-                return 0  # Highest priority
-            elif "google" in host_lower or "drive" in host_lower:
-                return 1  # Second priority
-            elif "mega" in host_lower:
-                return 2
-            elif "solidfiles" in host_lower:
-                return 3
-            elif "mp4upload" in host_lower:
-                return 4
-            elif "dropbox" in host_lower:
-                return 5
-            else:
-                return 6  # Lowest priority
+            return min((int(m.lastgroup[1:]) for m in _SERVER_PRIORITY_RE.finditer(link['host'])), default=6)
         
         # Sort links by priority
         return sorted(links, key=get_priority)
     
+    @staticmethod
+    def _find_episode(episodes: List[Dict[str, Any]], number: str) -> Optional[Dict[str, Any]]:
+        """The episode with the given number, or None (one lookup, so no index is built)."""
+        return next((ep for ep in episodes if ep['number'] == number), None)
+    
     def download_specific_anime(self, title: str, episode: str, site: Optional[str] = None):
         """Download a specific anime episode by title and episode number."""
         if not site:
@@ -2820,11 +3729,7 @@ class CLI:
                     
                     # Find the requested episode in cache
                     episodes = cached_data["episodes"]
-                    target_episode = None
-                    for ep in episodes:
-                        if ep['number'] == episode:
-                            target_episode = ep
-                            break
+                    target_episode = self._find_episode(episodes, episode)
                     
                     if target_episode:
                         print(f"\nDownloading episode {episode} of {cached_anime} from cache")
@@ -2845,12 +3750,16 @@ class CLI:
                 print("\nNo anime found with that title.")
                 return
             
-            # Find the best match
-            best_match = None
-            for result in results:
-                if title.lower() in result['title'].lower():
-                    best_match = result
-                    break
+            # Find the best match: the first title containing the query, else the
+            # closest fuzzy match (with rapidfuzz), else the first result
+            query = title.lower()
+            titles = [result['title'].lower() for result in results]
+            best_match = next((result for result, t in zip(results, titles) if query in t), None)
+            
+            if not best_match and fuzz is not None:
+                closest = fuzz_process.extractOne(query, titles, scorer=fuzz.ratio, score_cutoff=60)
+                if closest:
+                    best_match = results[closest[2]]
             
             if not best_match:
                 best_match = results[0]  # Take the first result if no good match
@@ -2876,11 +3785,7 @@ class CLI:
             self.database.add_anime(best_match['title'], anime_metadata)
             
             # Find the requested episode
-            target_episode = None
-            for ep in episodes:
-                if ep['number'] == episode:
-                    target_episode = ep
-                    break
+            target_episode = self._find_episode(episodes, episode)
             
             if not target_episode:
                 print(f"Episode {episode} not found. Available episodes:")
@@ -2941,20 +3846,25 @@ class CLI:
         else:
             print(f"{self._colorize('No episodes found in the database for this anime.', 'red')}")
     
+    # Title and column headings of the saved anime table
+    SAVED_ANIME_HEADER = "\n".join([
+        "\nSaved Anime:",
+        _ansi("=" * 80, "blue"),
+        f"{_ansi('#'.ljust(4), 'yellow')}{_ansi('Title'.ljust(40), 'yellow')}{_ansi('Episodes'.ljust(10), 'yellow')}{_ansi('Last Updated'.ljust(26), 'yellow')}",
+        _ansi("-" * 80, "blue"),
+    ])
+    
     def list_saved_anime(self):
         """List all saved anime."""
-        anime_list = self.database.data["anime"]
+        anime_list = self.database.get_all_anime()
         
         if not anime_list:
             print(f"{self._colorize('No anime saved in the database.', 'red')}")
             return
         
-        print("\nSaved Anime:")
-        print(self._colorize("=" * 80, "blue"))
-        print(f"{self._colorize('#', 'yellow'):<4}{self._colorize('Title', 'yellow'):<40}{self._colorize('Episodes', 'yellow'):<10}{self._colorize('Last Updated', 'yellow'):<26}")
-        print(self._colorize("-" * 80, "blue"))
-        
-        for i, (title, data) in enumerate(sorted(anime_list.items()), 1):
+        rows = [self.SAVED_ANIME_HEADER]
+        titles = list(anime_list)  # already sorted by the database
+        for i, (title, data) in enumerate(anime_list.items(), 1):
             episodes_count = len(data.get("episodes", []))
             last_updated = data.get("last_updated", "Unknown")
             
@@ -2963,9 +3873,9 @@ class CLI:
             if len(display_title) > 37:
                 display_title = display_title[:34] + "..."
             
-            print(f"{self._colorize(str(i), 'cyan'):<4}{display_title:<40}{episodes_count:<10}{last_updated:<26}")
-        
-        print(self._colorize("=" * 80, "blue"))
+            rows.append(f"{self._colorize(f'{i:<4}', 'cyan')}{display_title:<40}{episodes_count:<10}{last_updated:<26}")
+        rows.append(_ansi("=" * 80, "blue"))
+        sys.stdout.write("\n".join(rows) + "\n")
         
         # Show alternative title lookup option
         print(f"\nYou can download anime by entering its title or number.")
@@ -2979,7 +3889,7 @@ class CLI:
             idx = int(selection)
             if 1 <= idx <= len(anime_list):
                 # Get the title at this index
-                title = list(sorted(anime_list.keys()))[idx-1]
+                title = titles[idx-1]
                 self.download_anime(title)
             else:
                 error_msg = f'Invalid selection. Please choose between 1 and {len(anime_list)}.'
@@ -2988,19 +3898,24 @@ class CLI:
             # Selection is a title string
             self.download_anime(selection)
     
+    # Main menu of interactive mode, redrawn after every action
+    MENU = "\n".join([
+        "\nOptions:",
+        f"{_ansi('1.', 'cyan')} {_ansi('Search for anime', 'white')}",
+        f"{_ansi('2.', 'cyan')} {_ansi('List saved anime', 'white')}",
+        f"{_ansi('3.', 'cyan')} {_ansi('Download from saved', 'white')}",
+        f"{_ansi('4.', 'cyan')} {_ansi('Change default site', 'white')}",
+        f"{_ansi('5.', 'cyan')} {_ansi('Exit', 'white')}",
+        f"{_ansi('Tip:', 'yellow')} You can also type an anime name directly to search",
+    ]) + "\n"
+    
     def interactive_mode(self):
         """Start interactive mode."""
         print(f"\n{self._colorize('Welcome to Anime Downloader!', 'bold')}")
         print(self._colorize("----------------------------", "yellow"))
         
         while True:
-            print("\nOptions:")
-            print(f"{self._colorize('1.', 'cyan')} {self._colorize('Search for anime', 'white')}")
-            print(f"{self._colorize('2.', 'cyan')} {self._colorize('List saved anime', 'white')}")
-            print(f"{self._colorize('3.', 'cyan')} {self._colorize('Download from saved', 'white')}")
-            print(f"{self._colorize('4.', 'cyan')} {self._colorize('Change default site', 'white')}")
-            print(f"{self._colorize('5.', 'cyan')} {self._colorize('Exit', 'white')}")
-            print(f"{self._colorize('Tip:', 'yellow')} You can also type an anime name directly to search")
+            sys.stdout.write(self.MENU)
             
             choice = input(f"\n{self._colorize('Enter your choice (1-5) or anime name:', 'yellow')} ")
             
@@ -3029,9 +3944,6 @@ class CLI:
 
 
 if __name__ == "__main__":
-    # Add import for regular expressions if not already imported
-    import re
-    
     # Add signal handler for clean shutdown
     def signal_handler(sig, frame):
         print("\nOperation cancelled by user.")
@@ -3057,5 +3969,4 @@ if __name__ == "__main__":
             pass
     except Exception as e:
         print(f"\nAn unexpected error occurred: {e}")
-        import traceback
         traceback.print_exc()